@@ -0,0 +1,83 @@
+# ============================================================= #
+# Flashcard Master - deck storage benchmark                     #
+#                                                               #
+# Compares plain JSON with gzip / bz2 / xz compressed decks:    #
+# file size, save time and load time.                           #
+#                                                               #
+# Run from the project folder:                                  #
+#     python benchmarks/bench_storage.py --cards 100000         #
+# ============================================================= #
+
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Let the benchmark import main.py from the folder above
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from main import Flashcard, read_deck_file, write_deck_file  # noqa: E402
+
+
+FORMATS = [".json", ".json.gz", ".json.bz2", ".json.xz"]
+
+# Real decks repeat a lot of wording, so the fake deck does too
+SUBJECTS = ["heart", "kidney", "liver", "lung", "brain", "femur", "aorta", "thyroid", "pancreas", "spleen"]
+TEMPLATES = [
+    ("What is the main function of the {0}?", "The {0} is responsible for {1}."),
+    ("Which nerve supplies the {0}?", "The {0} is supplied by the {1} nerve."),
+    ("Name a common disease of the {0}.", "A common disease of the {0} is {1} disease."),
+    ("Where is the {0} located?", "The {0} is located near the {1}."),
+]
+
+
+def make_deck(count, seed=1):
+    """Builds `count` repetitive, realistic-looking flashcards."""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        question, answer = rng.choice(TEMPLATES)
+        subject = rng.choice(SUBJECTS)
+        other = rng.choice(SUBJECTS)
+        cards.append(Flashcard(question.format(subject) + f" (#{i})", answer.format(subject, other)))
+    return cards
+
+
+def best_time(func, repeat):
+    """Runs `func` `repeat` times and returns the fastest time in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed deck storage")
+    parser.add_argument("--cards", type=int, default=100000, help="number of cards (default: 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is kept (default: 3)")
+    args = parser.parse_args()
+
+    cards = make_deck(args.cards)
+    print(f"Deck of {args.cards} cards, best of {args.repeat} runs\n")
+    print(f"{'format':<10} {'size (KB)':>12} {'ratio':>7} {'save (s)':>10} {'load (s)':>10}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        plain_size = None
+        for extension in FORMATS:
+            path = os.path.join(folder, "deck" + extension)
+            save_time = best_time(lambda: write_deck_file(path, cards), args.repeat)
+            load_time = best_time(lambda: read_deck_file(path), args.repeat)
+            size = os.path.getsize(path)
+            if plain_size is None:
+                plain_size = size
+            print(f"{extension:<10} {size / 1024:>12.1f} {plain_size / size:>6.1f}x "
+                  f"{save_time:>10.3f} {load_time:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
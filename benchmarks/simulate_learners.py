@@ -0,0 +1,312 @@
+# ============================================================= #
+# Flashcard Master - learner simulation                         #
+#                                                               #
+# Runs synthetic learners through many days of practice on      #
+# many decks, without any window, to compare practice orders    #
+# ("schedulers") before trying them on real people.             #
+# Every review goes through the same PracticeSession state      #
+# machine (QUESTION_STATE -> ANSWER_STATE, StatTracker) that    #
+# Practice Mode uses.                                           #
+#                                                               #
+# Run from the project folder:                                  #
+#     python benchmarks/simulate_learners.py --days 30          #
+#     python benchmarks/simulate_learners.py --model fixed      #
+#         --recall 0.8 --decks 8 --learners 20                  #
+# ============================================================= #
+
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Let the simulation import main.py from the folder above
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from main import PracticeSession, read_deck_file, shuffle_scheduler  # noqa: E402
+from bench_storage import make_deck  # noqa: E402
+
+
+# --- Recall models ---
+# A model says how likely a learner is to remember a card, given what
+# happened the last time they saw it. `state` is None for a card the
+# learner has never seen; otherwise it is whatever update() returned.
+class FixedRecall(object):
+    """Remembers every card with the same probability, however often it is practiced."""
+    def __init__(self, recall=0.7):
+        self.recall = recall
+
+    def probability(self, state, day):
+        return self.recall
+
+    def update(self, state, day, remembered):
+        return None
+
+
+class ForgettingCurve(object):
+    """
+    Exponential forgetting: recall = exp(-days since the last review / stability).
+    A successful review multiplies the stability by `growth`; a lapse multiplies it by `lapse`.
+    """
+    def __init__(self, stability=1.0, growth=2.5, lapse=0.5, first_recall=0.3):
+        self.stability = stability
+        self.growth = growth
+        self.lapse = lapse
+        self.first_recall = first_recall
+
+    def probability(self, state, day):
+        if state is None:
+            return self.first_recall
+        last_day, stability = state
+        return math.exp(-(day - last_day) / stability)
+
+    def update(self, state, day, remembered):
+        if state is None:
+            stability = self.stability
+        else:
+            stability = state[1] * (self.growth if remembered else self.lapse)
+        # Nobody forgets a card faster than the first time they saw it
+        return (day, max(stability, self.stability))
+
+
+class Learner(object):
+    """A synthetic learner: a recall model plus their own memory of each card."""
+    def __init__(self, model, rng):
+        self.model = model
+        self.rng = rng
+        self.memory = {}  # id(card) -> the model's state for that card
+
+    def recall_probability(self, card, day):
+        return self.model.probability(self.memory.get(id(card)), day)
+
+    def answer(self, card, day):
+        """Tries to recall the card's answer; returns True if the learner would click Correct."""
+        state = self.memory.get(id(card))
+        remembered = self.rng.random() < self.model.probability(state, day)
+        self.memory[id(card)] = self.model.update(state, day, remembered)
+        return remembered
+
+
+# --- Schedulers ---
+# A scheduler is what PracticeSession calls to pick today's cards and their order.
+# The harness sets `day` before each session and calls record() after each review.
+class ShuffleScheduler(object):
+    """What Practice Mode does today: every card, every day, shuffled."""
+    def __init__(self, rng):
+        self.rng = rng
+        self.day = 0
+
+    def __call__(self, cards):
+        return shuffle_scheduler(cards, self.rng)
+
+    def record(self, card, was_correct, day):
+        pass
+
+
+class LeitnerScheduler(object):
+    """
+    Leitner boxes: a remembered card moves up a box and waits longer before it
+    comes back (1, 2, 4, 8 then 16 days); a forgotten card goes back to box 0.
+    """
+    INTERVALS = (1, 2, 4, 8, 16)
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.day = 0
+        self.boxes = {}  # id(card) -> (box, day it is due)
+
+    def __call__(self, cards):
+        due = [card for card in cards if self.boxes.get(id(card), (0, 0))[1] <= self.day]
+        return shuffle_scheduler(due, self.rng)
+
+    def record(self, card, was_correct, day):
+        box = self.boxes.get(id(card), (0, 0))[0]
+        box = min(box + 1, len(self.INTERVALS) - 1) if was_correct else 0
+        self.boxes[id(card)] = (box, day + self.INTERVALS[box])
+
+
+SCHEDULERS = {"shuffle": ShuffleScheduler, "leitner": LeitnerScheduler}
+MODELS = {"forgetting": ForgettingCurve, "fixed": FixedRecall}
+
+# The parts of one review that are timed separately
+STEPS = ("schedule", "question", "reveal", "learner", "mark", "record")
+
+
+# --- One simulation job (runs in a worker process) ---
+_decks = {}  # Decks already built or loaded by this worker process
+
+
+def get_deck(spec):
+    """Returns the cards for a deck spec: ("synthetic", cards, seed) or ("file", path)."""
+    if spec not in _decks:
+        if spec[0] == "synthetic":
+            _decks[spec] = make_deck(spec[1], seed=spec[2])
+        else:
+            _decks[spec] = read_deck_file(spec[1])[0]
+    return _decks[spec]
+
+
+def run_job(job):
+    """Simulates one learner practicing one deck for job["days"] days with one scheduler."""
+    cards = get_deck(job["deck"])
+    # The learner's luck doesn't depend on the scheduler, so schedulers
+    # are compared on exactly the same learners
+    learner_rng = random.Random(job["seed"])
+    model_options = dict(job["model_options"])
+    if job["model"] == "forgetting":
+        # Some learners are quicker than others
+        model_options["stability"] *= learner_rng.lognormvariate(0, job["spread"])
+    learner = Learner(MODELS[job["model"]](**model_options), learner_rng)
+    scheduler = SCHEDULERS[job["scheduler"]](random.Random(job["seed"] + 1))
+    session = PracticeSession(scheduler)
+
+    timings = dict.fromkeys(STEPS, 0.0)
+    daily_reviews = []
+    correct = 0
+    clock = time.perf_counter
+    started = clock()
+    for day in range(job["days"]):
+        scheduler.day = day
+        t0 = clock()
+        session.start(cards)
+        timings["schedule"] += clock() - t0
+        while True:
+            t0 = clock()
+            card = session.current_card()
+            t1 = clock()
+            if card is None:
+                break
+            session.show_answer()                   # QUESTION_STATE -> ANSWER_STATE
+            t2 = clock()
+            remembered = learner.answer(card, day)
+            t3 = clock()
+            session.mark(remembered)                # ANSWER_STATE -> next card
+            t4 = clock()
+            scheduler.record(card, remembered, day)
+            t5 = clock()
+            timings["question"] += t1 - t0
+            timings["reveal"] += t2 - t1
+            timings["learner"] += t3 - t2
+            timings["mark"] += t4 - t3
+            timings["record"] += t5 - t4
+        daily_reviews.append(session.stats.get_total_cards())
+        correct += session.stats.get_score()
+    elapsed = clock() - started
+
+    # Retention: how likely the learner is to remember each card the day after the run ends
+    retention = sum(learner.recall_probability(card, job["days"]) for card in cards) / max(len(cards), 1)
+    return {"scheduler": job["scheduler"], "retention": retention, "daily_reviews": daily_reviews,
+            "correct": correct, "elapsed": elapsed, "timings": timings}
+
+
+# --- Putting it together ---
+def build_jobs(args):
+    decks = [("synthetic", args.cards, seed) for seed in range(1, args.decks + 1)]
+    decks += [("file", path) for path in args.deck]
+    if args.model == "fixed":
+        model_options = {"recall": args.recall}
+    else:
+        model_options = {"stability": args.stability, "growth": args.growth,
+                         "lapse": args.lapse, "first_recall": args.first_recall}
+    jobs = []
+    for scheduler in args.schedulers:
+        for deck_number, deck in enumerate(decks):
+            for learner in range(args.learners):
+                jobs.append({"scheduler": scheduler, "deck": deck, "days": args.days,
+                             "model": args.model, "model_options": model_options, "spread": args.spread,
+                             "seed": args.seed * 1000003 + deck_number * 1009 + learner})
+    return jobs
+
+
+def summarize(results, wall_time):
+    """Combines the job results into one summary per scheduler."""
+    summary = {}
+    for name in dict.fromkeys(result["scheduler"] for result in results):
+        mine = [result for result in results if result["scheduler"] == name]
+        reviews = sum(sum(result["daily_reviews"]) for result in mine)
+        days = sum(len(result["daily_reviews"]) for result in mine)
+        busy = sum(result["elapsed"] for result in mine)
+        summary[name] = {
+            "runs": len(mine),
+            "retention": sum(result["retention"] for result in mine) / len(mine),
+            "accuracy": sum(result["correct"] for result in mine) / max(reviews, 1),
+            "reviews": reviews,
+            "reviews_per_day": reviews / max(days, 1),
+            "peak_reviews_per_day": max(max(result["daily_reviews"], default=0) for result in mine),
+            "reviews_per_second": reviews / busy if busy else 0.0,
+            "step_microseconds": {step: sum(result["timings"][step] for result in mine) / max(reviews, 1) * 1e6
+                                  for step in STEPS},
+        }
+    total_reviews = sum(entry["reviews"] for entry in summary.values())
+    return {"schedulers": summary, "wall_time": wall_time,
+            "reviews_per_second": total_reviews / wall_time if wall_time else 0.0}
+
+
+def print_summary(summary):
+    print(f"{'scheduler':<10} {'runs':>5} {'retention':>10} {'accuracy':>9} {'reviews/day':>12} "
+          f"{'peak/day':>9} {'reviews':>10} {'reviews/s':>10}")
+    for name, entry in summary["schedulers"].items():
+        print(f"{name:<10} {entry['runs']:>5} {entry['retention']:>9.1%} {entry['accuracy']:>9.1%} "
+              f"{entry['reviews_per_day']:>12.1f} {entry['peak_reviews_per_day']:>9} "
+              f"{entry['reviews']:>10} {entry['reviews_per_second']:>10.0f}")
+
+    print("\nTime per review step (microseconds):")
+    print(f"{'scheduler':<10} " + " ".join(f"{step:>9}" for step in STEPS))
+    for name, entry in summary["schedulers"].items():
+        print(f"{name:<10} " + " ".join(f"{entry['step_microseconds'][step]:>9.2f}" for step in STEPS))
+
+    print(f"\nAll runs took {summary['wall_time']:.2f}s "
+          f"({summary['reviews_per_second']:.0f} simulated reviews/s across all workers).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate learners to compare practice schedulers")
+    parser.add_argument("--schedulers", nargs="+", choices=sorted(SCHEDULERS), default=["shuffle", "leitner"],
+                        help="schedulers to compare (default: shuffle leitner)")
+    parser.add_argument("--decks", type=int, default=4, help="number of made-up decks (default: 4)")
+    parser.add_argument("--cards", type=int, default=200, help="cards per made-up deck (default: 200)")
+    parser.add_argument("--deck", action="append", default=[], metavar="PATH",
+                        help="also simulate a real deck file (can be given more than once)")
+    parser.add_argument("--learners", type=int, default=10, help="learners per deck (default: 10)")
+    parser.add_argument("--days", type=int, default=30, help="days of practice (default: 30)")
+    parser.add_argument("--model", choices=sorted(MODELS), default="forgetting",
+                        help="how learners remember cards (default: forgetting)")
+    parser.add_argument("--recall", type=float, default=0.7,
+                        help="fixed model: chance of remembering a card (default: 0.7)")
+    parser.add_argument("--stability", type=float, default=1.0,
+                        help="forgetting model: days until recall drops to 37%% after a first look (default: 1.0)")
+    parser.add_argument("--growth", type=float, default=2.5,
+                        help="forgetting model: stability multiplier after a correct review (default: 2.5)")
+    parser.add_argument("--lapse", type=float, default=0.5,
+                        help="forgetting model: stability multiplier after a wrong review (default: 0.5)")
+    parser.add_argument("--first-recall", type=float, default=0.3,
+                        help="forgetting model: chance of knowing a card never seen before (default: 0.3)")
+    parser.add_argument("--spread", type=float, default=0.3,
+                        help="forgetting model: how much learners differ from each other (default: 0.3)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    parser.add_argument("--json", metavar="PATH", help="also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    jobs = build_jobs(args)
+    print(f"{len(jobs)} runs: {len(args.schedulers)} scheduler(s) x {args.decks + len(args.deck)} deck(s) "
+          f"x {args.learners} learner(s), {args.days} days each, on {args.workers} worker(s)\n")
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Bigger chunks mean fewer trips between processes
+        chunksize = max(1, len(jobs) // (args.workers * 4))
+        results = list(pool.map(run_job, jobs, chunksize=chunksize))
+    summary = summarize(results, time.perf_counter() - started)
+
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,18 +11,49 @@
 import random
 import json
 import os
+import re
+import time
+import sys
+import zlib
+import argparse
+import bisect
+import asyncio
+import copy
+import tempfile
+import contextlib
+import difflib
+import lzma
+import gzip
+import bz2
+import io
+import math
+import shutil
+import hashlib
+import urllib.error
+import urllib.parse
+import urllib.request
+from array import array
+from collections import Counter, OrderedDict, deque
 from abc import ABC, abstractmethod  # We import ABC tools to create an "abstract" base class
 
+# --- File Locking (for sharing one deck between app windows) ---
+try:
+    import fcntl  # Linux / macOS
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows
+
 # --- Robust Tkinter Import ---
 try:
     import tkinter as tk
-    from tkinter import messagebox, font
+    from tkinter import messagebox, font, filedialog
 except ImportError:
     try:
         # Fallback for Python 2
         import Tkinter as tk
         import tkMessageBox as messagebox
         import tkFont as font
+        import tkFileDialog as filedialog
     except ImportError:
         print("Error: Tkinter/Tkinter module not found. The application cannot run.")
         exit()
@@ -42,19 +73,33 @@ BUTTON_RELIEF = 'groove'
 
 # --- Flashcard Data Class ---
 # This class is a "blueprint" for our flashcard data.
-# It just holds a question and an answer.
+# It holds a question and an answer, plus any images attached to each side.
 class Flashcard(object):
     """Represents a single flashcard."""
-    def __init__(self, question, answer):
+    def __init__(self, question, answer, question_media=(), answer_media=()):
         self.question = question
         self.answer = answer
+        # Media names (see MediaStore). Tuples are used because the empty
+        # tuple is shared, so text-only cards cost no extra memory.
+        self.question_media = tuple(question_media)
+        self.answer_media = tuple(answer_media)
+
+    def key(self):
+        """Returns a hashable value that is the same for cards with the same content."""
+        return (self.question, self.answer, self.question_media, self.answer_media)
 
     def to_dict(self):
         """Converts the Flashcard object to a dictionary so it can be saved to JSON."""
-        return {
+        data = {
             'question': self.question,
             'answer': self.answer
         }
+        # Only cards that have images get the extra keys, so text-only decks look the same
+        if self.question_media:
+            data['question_media'] = list(self.question_media)
+        if self.answer_media:
+            data['answer_media'] = list(self.answer_media)
+        return data
     
 
     def __repr__(self):
@@ -62,6 +107,756 @@ class Flashcard(object):
         return f"Flashcard(q='{self.question[:20]}...')"
 
 
+def _media_names(item, field):
+    """Returns the media names saved under `field`, raising ValueError unless they are a list of strings."""
+    names = item.get(field, [])
+    # Checked because tuple() would happily turn "x.png" into ('x', '.', 'p', 'n', 'g')
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError(f"'{field}' must be a list of file names but found {names!r}")
+    return names
+
+
+def card_from_dict(item):
+    """Builds a Flashcard from one saved dictionary."""
+    if not isinstance(item, dict):
+        raise ValueError(f"Expected a card in the deck file but found {item!r}")
+    # item.get() is safer than item[] as it won't crash if a key is missing
+    return Flashcard(
+        question=item.get('question', ''),
+        answer=item.get('answer', ''),
+        question_media=_media_names(item, 'question_media'),
+        answer_media=_media_names(item, 'answer_media')
+    )
+
+
+_NON_WORD = re.compile(r"\W+")
+
+
+def normalize_text(text):
+    """Lowercases text and keeps only letters/numbers separated by single spaces."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+# --- Compressed Deck Files ---
+# The file extension picks the compression, e.g. "flashcards.json.gz".
+# Each entry wraps an already-open binary file in a (de)compressor.
+_DECK_CODECS = {
+    '.gz': lambda raw, mode: gzip.GzipFile(fileobj=raw, mode=mode, compresslevel=6),
+    '.bz2': lambda raw, mode: bz2.BZ2File(raw, mode),
+    '.xz': lambda raw, mode: lzma.LZMAFile(raw, mode),
+    '.lzma': lambda raw, mode: lzma.LZMAFile(raw, mode, format=lzma.FORMAT_ALONE if 'w' in mode else lzma.FORMAT_AUTO),
+}
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+def deck_extension(path):
+    """Returns the compression extension of `path` (e.g. '.gz'), or None for plain JSON."""
+    extension = os.path.splitext(path)[1].lower()
+    return extension if extension in _DECK_CODECS else None
+
+
+def deck_stem(path):
+    """Returns the deck path without its extensions: 'flashcards.json.gz' -> 'flashcards'."""
+    if deck_extension(path):
+        path = os.path.splitext(path)[0]
+    return os.path.splitext(path)[0]
+
+
+def iter_json_array(f, head, chunk_size=1 << 16):
+    """
+    Yields the items of a JSON array one at a time while reading `f` in chunks,
+    so the whole (uncompressed) document is never held in memory at once.
+    `head` is text already read from `f`; it must start with the '['.
+    """
+    decode = json.JSONDecoder().raw_decode
+    buf = head
+    pos = _WHITESPACE.match(buf).end() + 1  # Skip the '['
+    eof = False
+    need_comma = False
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                raise ValueError("The deck file ended unexpectedly")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        if buf[pos] == ']':
+            return
+        if need_comma:
+            if buf[pos] != ',':
+                raise ValueError(f"Expected ',' in the deck file but found {buf[pos]!r}")
+            pos += 1
+            need_comma = False
+            continue
+
+        try:
+            item, end = decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The item is cut off at the end of this chunk: read more and try again
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+        need_comma = True
+
+
+def read_deck_file(path):
+    """
+    Reads a deck file *without* any GUI popups.
+    Returns (cards, migrated) where `migrated` is True if the file
+    was in the old {question: answer} format.
+    Raises ValueError if the file is damaged or in a format we don't recognize
+    (IOError is only raised when the file itself can't be read, e.g. no permission).
+    """
+    codec = _DECK_CODECS.get(deck_extension(path))
+    with open(path, 'rb') as raw:
+        stream = codec(raw, 'rb') if codec else raw
+        try:
+            with io.TextIOWrapper(stream, encoding='utf-8') as f:
+                head = f.read(1 << 16)
+                if head.lstrip().startswith('['):
+                    # This handles the new format (a list of dicts), one card at a time
+                    return [card_from_dict(item) for item in iter_json_array(f, head)], False
+                data = json.loads(head + f.read())
+        except (EOFError, lzma.LZMAError) as e:
+            raise ValueError(f"The compressed deck is damaged: {e}") from e
+        except OSError as e:
+            # Bad gzip/bz2 data is reported as an OSError without an errno
+            if e.errno is not None:
+                raise
+            raise ValueError(f"The compressed deck is damaged: {e}") from e
+
+    if isinstance(data, dict):
+        # --- MIGRATION LOGIC ---
+        # This handles the old {question: answer} format
+        return [Flashcard(q, a) for q, a in data.items()], True
+    raise ValueError("Data is not a valid list or dict")
+
+
+def write_deck_file(path, cards, extension=None):
+    """
+    Writes a list of Flashcard objects to `path` *without* any GUI popups.
+    `extension` picks the compression (defaults to the one in `path`).
+    Cards are written one at a time, so the whole document is never built in memory.
+    """
+    if extension is None:
+        extension = deck_extension(path)
+    codec = _DECK_CODECS.get(extension)
+
+    with open(path, 'wb') as raw:
+        stream = codec(raw, 'wb') if codec else raw
+        f = io.TextIOWrapper(stream, encoding='utf-8')
+        f.write('[')
+        for i, card in enumerate(cards):
+            # The 'card.to_dict()' method comes from our Flashcard class
+            if codec:
+                # Compressed files: one compact card per line (the compressor
+                # does a far better job than indenting ever could)
+                text = json.dumps(card.to_dict(), ensure_ascii=False, separators=(',', ':'))
+                f.write(('\n' if i == 0 else ',\n') + text)
+            else:
+                # Plain files: indent=2 makes the file human-readable (pretty-prints it),
+                # exactly like json.dump(list_of_cards, f, indent=2) would
+                text = json.dumps(card.to_dict(), indent=2, ensure_ascii=False)
+                f.write(('\n  ' if i == 0 else ',\n  ') + text.replace('\n', '\n  '))
+        f.write('\n]' if cards else ']')
+        f.flush()
+        f.detach()  # Done with the text layer, but keep the files underneath open
+        if codec:
+            stream.close()  # Writes the compressor's end marker (the raw file stays open)
+        # Make sure the bytes are really on disk before anyone swaps this file in
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+@contextlib.contextmanager
+def file_lock(lock_path):
+    """Holds an exclusive advisory lock on `lock_path` for the length of a `with` block."""
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def merge_decks(base_keys, ours, theirs):
+    """
+    Three-way merge of two edited copies of the same deck.
+    - `base_keys` is a Counter of card keys both copies started from.
+    - `ours` is our edited list, `theirs` is what another window saved.
+    Our deletions are removed from their list and our new/edited cards are
+    added to the end, so neither window's changes are lost.
+    """
+    ours_keys = Counter(card.key() for card in ours)
+    added = ours_keys - base_keys
+    removed = base_keys - ours_keys
+
+    # Our own objects are reused where the content matches, so pages that
+    # still hold a reference to one of our cards keep working.
+    our_cards = {}
+    for card in ours:
+        our_cards.setdefault(card.key(), []).append(card)
+
+    merged = []
+    for card in theirs:
+        key = card.key()
+        if removed[key] > 0:
+            removed[key] -= 1  # We deleted (or edited) this card
+            continue
+        mine = our_cards.get(key)
+        merged.append(mine.pop() if mine else card)
+    for card in ours:
+        key = card.key()
+        if added[key] > 0:
+            added[key] -= 1
+            merged.append(card)
+    return merged
+
+
+class DeckFile(object):
+    """
+    Safe reading and writing of one deck file shared by several app windows.
+
+    - Saves are written to a temporary file and swapped in with os.replace(),
+      so nobody ever sees a half-written file and readers never need to wait.
+    - A small lock file is held only for the quick "check version and swap" step.
+    - If another window saved since we last loaded or saved (the file's
+      version changed), both sets of changes are merged instead of the last
+      writer silently winning.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._base_keys = Counter()  # The cards as they were when we last loaded/saved
+        self._version = None
+
+    def version(self):
+        """Returns a value that changes every time the file is replaced (None if missing)."""
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+    def load(self):
+        """Reads the deck (no lock needed). Returns (cards, migrated) like read_deck_file()."""
+        version = self.version()
+        cards, migrated = read_deck_file(self.path)
+        self._base_keys = Counter(card.key() for card in cards)
+        self._version = version
+        return cards, migrated
+
+    def _write_temp(self, cards):
+        """Writes `cards` to a new temporary file next to the deck and returns its path."""
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+        os.close(fd)
+        try:
+            # The temp file name ends in ".tmp", so pass the real deck's compression
+            write_deck_file(tmp_path, cards, extension=deck_extension(self.path))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def save(self, cards):
+        """
+        Saves `cards`, merging in anything other windows saved in the meantime.
+        The list is updated *in place* to the merged result.
+        Returns True if a merge was needed.
+        """
+        merged = False
+        tmp_path = self._write_temp(cards)
+        try:
+            while True:
+                # The slow work (writing, reading, merging) happens *outside* the
+                # lock; the lock only covers this quick version check and swap.
+                with file_lock(self.lock_path):
+                    their_version = self.version()
+                    if their_version == self._version or their_version is None:
+                        os.replace(tmp_path, self.path)
+                        self._version = self.version()
+                        break
+
+                # Someone else saved since we loaded: merge their changes into ours
+                theirs, _ = read_deck_file(self.path)
+                cards[:] = merge_decks(self._base_keys, cards, theirs)
+                self._base_keys = Counter(card.key() for card in theirs)
+                self._version = their_version
+                merged = True
+                os.remove(tmp_path)
+                tmp_path = self._write_temp(cards)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._base_keys = Counter(card.key() for card in cards)
+        return merged
+
+
+# --- Lining Up Two Versions of a Deck ---
+# difflib finds the smallest set of changes, but its time grows with the square
+# of the deck size once edits are spread across the deck (a find-and-replace
+# touching 5% of 200k cards took minutes). diff_keys() is a "patience diff":
+# cards that appear exactly once in both versions are lined up first, which is
+# linear, and difflib only runs on the short gaps between them.
+_DIFF_GAP_LIMIT = 100000  # Largest (old x new) gap handed to difflib
+
+
+def _change(i1, i2, j1, j2):
+    """Returns the difflib-style opcode for old[i1:i2] becoming new[j1:j2]."""
+    tag = 'replace' if i1 < i2 and j1 < j2 else ('delete' if i1 < i2 else 'insert')
+    return (tag, i1, i2, j1, j2)
+
+
+def _diff_gap(old_keys, new_keys, i1, i2, j1, j2, changes):
+    """Adds the changes between old_keys[i1:i2] and new_keys[j1:j2] to `changes`."""
+    while i1 < i2 and j1 < j2 and old_keys[i1] == new_keys[j1]:
+        i1 += 1
+        j1 += 1
+    while i1 < i2 and j1 < j2 and old_keys[i2 - 1] == new_keys[j2 - 1]:
+        i2 -= 1
+        j2 -= 1
+    if i1 == i2 and j1 == j2:
+        return
+    if i1 == i2 or j1 == j2 or (i2 - i1) * (j2 - j1) > _DIFF_GAP_LIMIT:
+        if i2 - i1 != j2 - j1:
+            # Too big for difflib: replacing the whole gap is still correct
+            changes.append(_change(i1, i2, j1, j2))
+            return
+        # Same length: compare card by card and keep each run of changed cards
+        i, j = i1, j1
+        while i < i2:
+            if old_keys[i] == new_keys[j]:
+                i += 1
+                j += 1
+                continue
+            run_i, run_j = i, j
+            while i < i2 and old_keys[i] != new_keys[j]:
+                i += 1
+                j += 1
+            changes.append(('replace', run_i, i, run_j, j))
+        return
+    matcher = difflib.SequenceMatcher(None, old_keys[i1:i2], new_keys[j1:j2], autojunk=False)
+    for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+        if tag != 'equal':
+            changes.append((tag, i1 + a1, i1 + a2, j1 + b1, j1 + b2))
+
+
+def diff_keys(old_keys, new_keys):
+    """
+    Lines up two lists of card keys. Returns the differences in order as
+    (tag, i1, i2, j1, j2) tuples, like difflib's get_opcodes() without the
+    'equal' ones: old_keys[i1:i2] became new_keys[j1:j2].
+    """
+    # Matching beginnings and ends are skipped first
+    start = 0
+    limit = min(len(old_keys), len(new_keys))
+    while start < limit and old_keys[start] == new_keys[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old_keys[-1 - end] == new_keys[-1 - end]:
+        end += 1
+    old_end, new_end = len(old_keys) - end, len(new_keys) - end
+
+    # Anchors: cards that appear exactly once in each version's middle part
+    old_counts = Counter(old_keys[start:old_end])
+    new_counts = Counter(new_keys[start:new_end])
+    new_position = {}
+    for j in range(start, new_end):
+        key = new_keys[j]
+        if new_counts[key] == 1 and old_counts[key] == 1:
+            new_position[key] = j
+    pairs = []
+    for i in range(start, old_end):
+        j = new_position.get(old_keys[i])
+        if j is not None:
+            pairs.append((i, j))
+
+    # Cards that moved break the order, so keep the longest run of anchors
+    # whose new positions still go up (longest increasing subsequence)
+    tails = []      # tails[k]: the pair ending the best run of length k + 1...
+    tail_ends = []  # ...and its new position, kept sorted for bisect
+    previous = [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        k = bisect.bisect_left(tail_ends, j)
+        previous[index] = tails[k - 1] if k else None
+        if k == len(tails):
+            tails.append(index)
+            tail_ends.append(j)
+        else:
+            tails[k] = index
+            tail_ends[k] = j
+    anchors = []
+    index = tails[-1] if tails else None
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+
+    changes = []
+    i, j = start, start
+    for anchor_i, anchor_j in anchors:
+        _diff_gap(old_keys, new_keys, i, anchor_i, j, anchor_j, changes)
+        i, j = anchor_i + 1, anchor_j + 1
+    _diff_gap(old_keys, new_keys, i, old_end, j, new_end, changes)
+    return changes
+
+
+# --- Deck History (versions you can roll back to) ---
+# Every so often a version of the deck is recorded in a "<deck>_history" folder.
+# Most versions are stored as a small compressed *delta*: just the cards that
+# were added, changed or removed since the version before. Now and then a full
+# compressed copy (a "keyframe") is stored so restoring never has to replay
+# too many deltas. A keyframe is only written once the deltas since the last
+# one add up to more than a full copy, so the folder grows with the amount of
+# change, not with the number of versions.
+class DeckHistory(object):
+    """Records, lists, restores and compares versions of a deck."""
+    def __init__(self, data_file, interval=3600):
+        self.folder = deck_stem(data_file) + "_history"
+        self.index_path = os.path.join(self.folder, "index.json")
+        self.lock_path = os.path.join(self.folder, "index.lock")
+        # Minimum number of seconds between automatic versions (see maybe_record)
+        self.interval = interval
+        self._head_version = None  # Newest version we know the contents of...
+        self._head_keys = None     # ...and the keys of its cards, for the next delta
+
+    def versions(self):
+        """Returns the list of recorded versions (oldest first)."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_index(self, entries):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _write_file(self, name, data):
+        """Writes `data` as lzma-compressed JSON and returns the file size in bytes."""
+        path = os.path.join(self.folder, name)
+        with lzma.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        return os.path.getsize(path)
+
+    def _read_file(self, name):
+        with lzma.open(os.path.join(self.folder, name), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def maybe_record(self, cards):
+        """Records a version if `interval` seconds have passed since the last one."""
+        entries = self.versions()
+        if entries and time.time() - entries[-1]['time'] < self.interval:
+            return None
+        return self.record(cards)
+
+    def record(self, cards):
+        """
+        Records `cards` as a new version. Returns the new version number,
+        or None if nothing changed since the last version.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        # The lock stops two windows from writing the same version number
+        with file_lock(self.lock_path):
+            entries = self.versions()
+            latest = entries[-1]['version'] if entries else 0
+            if latest and self._head_version != latest:
+                # Another window recorded since we last looked, so catch up
+                self._head_keys = [card.key() for card in self.restore(latest)]
+                self._head_version = latest
+
+            new_keys = [card.key() for card in cards]
+            version = latest + 1
+            entry = {'version': version, 'time': int(time.time()), 'cards': len(cards)}
+
+            # Size of the deltas since the last keyframe vs. the keyframe itself
+            since_full = 0
+            full_size = 0
+            for old in reversed(entries):
+                if old['kind'] == 'full':
+                    full_size = old['size']
+                    break
+                since_full += old['size']
+
+            if not entries or since_full > full_size:
+                entry['kind'] = 'full'
+                entry['file'] = f"v{version:06d}.full.json.xz"
+                entry['size'] = self._write_file(entry['file'], [card.to_dict() for card in cards])
+            else:
+                ops = self._diff(self._head_keys, new_keys, cards)
+                if not ops:
+                    return None
+                entry['kind'] = 'delta'
+                entry['file'] = f"v{version:06d}.delta.json.xz"
+                entry['size'] = self._write_file(entry['file'], ops)
+
+            entries.append(entry)
+            self._write_index(entries)
+            self._head_version = version
+            self._head_keys = new_keys
+            return version
+
+    @staticmethod
+    def _diff(old_keys, new_keys, new_cards):
+        """
+        Returns a delta as a list of [start, end, [new card dicts]] operations:
+        "replace old cards start..end with these cards". Adds have start == end,
+        removes have no new cards, and edits replace cards one for one.
+        """
+        return [[i1, i2, [card.to_dict() for card in new_cards[j1:j2]]]
+                for _, i1, i2, j1, j2 in diff_keys(old_keys, new_keys)]
+
+    def restore(self, version):
+        """
+        Returns the cards of `version` as a list of Flashcard objects.
+        Starts from the nearest keyframe and applies each delta to the same
+        list in turn, loading one delta file at a time.
+        """
+        entries = [e for e in self.versions() if e['version'] <= version]
+        if not entries or entries[-1]['version'] != version:
+            raise ValueError(f"Version {version} does not exist")
+        first = max(i for i, e in enumerate(entries) if e['kind'] == 'full')
+
+        cards = [card_from_dict(item) for item in self._read_file(entries[first]['file'])]
+        for entry in entries[first + 1:]:
+            # Applied back to front so the earlier positions are still correct
+            for start, end, new_items in reversed(self._read_file(entry['file'])):
+                cards[start:end] = [card_from_dict(item) for item in new_items]
+        return cards
+
+    def diff(self, version_a, version_b):
+        """Returns (added, removed, changed) cards going from version_a to version_b."""
+        old = self.restore(version_a)
+        new = self.restore(version_b)
+        added, removed, changed = [], [], []
+        for tag, i1, i2, j1, j2 in diff_keys([c.key() for c in old], [c.key() for c in new]):
+            if tag == 'replace':
+                # Cards replaced one for one count as edits, any extras as adds/removes
+                pairs = min(i2 - i1, j2 - j1)
+                changed.extend(zip(old[i1:i1 + pairs], new[j1:j1 + pairs]))
+                removed.extend(old[i1 + pairs:i2])
+                added.extend(new[j1 + pairs:j2])
+            elif tag == 'delete':
+                removed.extend(old[i1:i2])
+            elif tag == 'insert':
+                added.extend(new[j1:j2])
+        return added, removed, changed
+
+
+# --- Media Attachments ---
+# Images live in a "<deck>_media" folder next to the deck. Each file is named
+# after a hash of its contents, so attaching the same picture to a hundred
+# cards still stores it only once.
+class MediaStore(object):
+    """Content-addressed folder of media files for one deck."""
+    def __init__(self, data_file):
+        self.folder = deck_stem(data_file) + "_media"
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def add(self, source_path):
+        """Copies a file into the store (if it isn't there already) and returns its media name."""
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        name = digest.hexdigest() + os.path.splitext(source_path)[1].lower()
+
+        target = self.path(name)
+        if not os.path.exists(target):
+            os.makedirs(self.folder, exist_ok=True)
+            # Copy then rename, so a half-copied file never appears under the real name
+            tmp_path = target + ".tmp"
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, target)
+        return name
+
+
+class MediaCache(object):
+    """
+    Keeps recently shown images decoded and shrunk to size, so flipping back
+    and forth between cards doesn't decode the same file again.
+    The cache is limited by (roughly) how much memory the pixels take up;
+    the least recently used images are dropped first, so memory stays flat
+    no matter how many cards a session goes through.
+    """
+    def __init__(self, master, store, budget_bytes=64 * 1024 * 1024):
+        self.master = master
+        self.store = store
+        self.budget_bytes = budget_bytes
+        self._images = OrderedDict()  # (name, width, height) -> (PhotoImage, bytes)
+        self._used_bytes = 0
+        self._broken = set()  # Files that couldn't be decoded, so we don't keep retrying
+
+    def get(self, name, max_width, max_height):
+        """Returns a PhotoImage of `name` no bigger than max_width x max_height (None if unreadable)."""
+        key = (name, max_width, max_height)
+        entry = self._images.get(key)
+        if entry is not None:
+            self._images.move_to_end(key)  # Now the most recently used
+            return entry[0]
+        if name in self._broken:
+            return None
+
+        image = self._decode(name, max_width, max_height)
+        if image is None:
+            self._broken.add(name)
+            return None
+
+        cost = image.width() * image.height() * 4  # About 4 bytes per pixel
+        self._images[key] = (image, cost)
+        self._used_bytes += cost
+        # Drop the least recently used images until we are back under budget
+        while self._used_bytes > self.budget_bytes and len(self._images) > 1:
+            _, (_, old_cost) = self._images.popitem(last=False)
+            self._used_bytes -= old_cost
+        return image
+
+    def _decode(self, name, max_width, max_height):
+        """Decodes the file and shrinks it to fit. Tk can read PNG, GIF and PPM/PGM."""
+        try:
+            image = tk.PhotoImage(master=self.master, file=self.store.path(name))
+        except tk.TclError:
+            return None  # Missing file or a format Tk can't read
+        factor = math.ceil(max(image.width() / max_width, image.height() / max_height, 1))
+        if factor > 1:
+            # The full-size image is dropped as soon as the small copy exists
+            image = image.subsample(factor)
+        return image
+
+    def prefetch(self, names, max_width, max_height):
+        """Decodes images ahead of time (e.g. for the next card) so showing them is instant."""
+        for name in names:
+            self.get(name, max_width, max_height)
+
+
+class MediaStrip(tk.Frame):
+    """A row of image thumbnails. Labels are reused, not recreated, for every card."""
+    def __init__(self, parent, cache, max_width, max_height, bg=COLOR_CARD_BG):
+        super().__init__(parent, bg=bg)
+        self.cache = cache
+        self.max_width = max_width
+        self.max_height = max_height
+        self.labels = []
+        self.shown = ()
+
+    def show(self, names):
+        """Shows the given media names (an empty tuple hides the strip's images)."""
+        names = tuple(names)
+        if names == self.shown:
+            return  # Nothing changed, so don't touch the widgets
+        self.shown = names
+
+        while len(self.labels) < len(names):
+            label = tk.Label(self, bg=self['bg'], fg=COLOR_TEXT_DARK)
+            self.labels.append(label)
+        for i, label in enumerate(self.labels):
+            if i < len(names):
+                image = self.cache.get(names[i], self.max_width, self.max_height)
+                if image is None:
+                    label.config(image='', text=f"[missing image {names[i][:8]}]")
+                else:
+                    label.config(image=image, text='')
+                # Keep a reference, or Python would delete the image while it is on screen
+                label.image = image
+                label.pack(side='left', padx=(0, 8))
+            else:
+                label.config(image='', text='')
+                label.image = None
+                label.pack_forget()
+
+
+class BufferedText(tk.Frame):
+    """
+    A read-only, scrollable text area made of two stacked Text widgets.
+    The one underneath can be filled with the *next* card ahead of time
+    (Tk lays out its lines while it is hidden), so switching cards is just
+    raising it to the top instead of deleting, inserting and re-wrapping text.
+    """
+    def __init__(self, parent, scrollbar, **text_options):
+        super().__init__(parent, bg=text_options.get('bg'))
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.scrollbar = scrollbar
+        self.front = self._make_text(text_options)
+        self.back = self._make_text(text_options)
+        self.front.tkraise()
+        # The scrollbar always drives whichever Text is in front
+        self.front.config(yscrollcommand=scrollbar.set)
+        scrollbar.config(command=lambda *args: self.front.yview(*args))
+        # (content, hidden) currently in each Text, so nothing is refilled for no reason
+        self.front_content = None
+        self.back_content = None
+
+    def _make_text(self, options):
+        text = tk.Text(self, state=tk.DISABLED, **options)
+        text.grid(row=0, column=0, sticky='nsew')
+        # Text with the "hidden" tag is in the widget (and laid out) but not drawn
+        text.tag_configure('hidden', elide=True)
+        return text
+
+    @staticmethod
+    def _fill(text, content, hidden):
+        # We have to set state to NORMAL to change the text...
+        text.config(state=tk.NORMAL)
+        text.delete("1.0", tk.END)
+        text.insert("1.0", content, ('hidden',) if hidden else ())
+        # ...and then set it back to DISABLED so the user can't type in it.
+        text.config(state=tk.DISABLED)
+        # Scroll to top
+        text.yview_moveto(0)
+
+    def prepare(self, content, hidden=False):
+        """Fills the hidden Text with content that will probably be shown next."""
+        if self.back_content != (content, hidden):
+            self._fill(self.back, content, hidden)
+            self.back_content = (content, hidden)
+
+    def show(self, content, hidden=False):
+        """Shows `content`. With hidden=True it is loaded but invisible until reveal()."""
+        wanted = (content, hidden)
+        if self.front_content == wanted:
+            return
+        if self.back_content == wanted:
+            # Already prepared: just swap the two Text widgets
+            self.front, self.back = self.back, self.front
+            self.front_content, self.back_content = self.back_content, self.front_content
+            self.front.tkraise()
+            self.back.config(yscrollcommand='')
+            self.front.config(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.set(*self.front.yview())
+        else:
+            self._fill(self.front, content, hidden)
+            self.front_content = wanted
+
+    def reveal(self):
+        """Makes hidden content visible with one tag change (no re-insert, no re-wrap)."""
+        if self.front_content is not None and self.front_content[1]:
+            self.front.tag_remove('hidden', "1.0", tk.END)
+            self.front_content = (self.front_content[0], False)
+
+
 # --- COMPOSITION: StatTracker Class ---
 # This class is a good example of "Composition".
 # Instead of the PracticePage trying to manage stats *and* UI,
@@ -94,11 +889,1078 @@ class StatTracker(object):
         return f"Score: {self._score}/{self._total_cards}"
 
 
+# --- Practice State Machine ---
+def shuffle_scheduler(cards, rng=random):
+    """The standard practice order: every card once, shuffled."""
+    # `list()` creates a new *shallow copy* of the deck.
+    # This is important so shuffling doesn't mess up the original list.
+    cards = list(cards)
+    rng.shuffle(cards)
+    return cards
+
+
+class PracticeSession(object):
+    """
+    The practice "state machine" on its own, without any window.
+    PracticePage drives one from button clicks, and the learner
+    simulation (benchmarks/simulate_learners.py) drives many of them directly.
+    """
+    # --- STATE CONSTANTS ---
+    # Using constants makes the state machine logic easier to read
+    QUESTION_STATE = 0
+    ANSWER_STATE = 1
+
+    def __init__(self, scheduler=shuffle_scheduler):
+        # A session "has a" StatTracker. (Composition)
+        self.stats = StatTracker()
+        # The scheduler decides which cards are practiced, and in what order
+        self.scheduler = scheduler
+        self.state = self.QUESTION_STATE
+        self.cards = [] # This will be a list of Flashcard objects
+        self.index = 0
+
+    def start(self, cards):
+        """Starts a new session over `cards`."""
+        self.cards = self.scheduler(cards)
+        self.index = 0
+        self.state = self.QUESTION_STATE
+        self.stats.reset(len(self.cards)) # Reset the stat tracker
+
+    def current_card(self):
+        """The card being practiced, or None when the session is over."""
+        return self.cards[self.index] if self.index < len(self.cards) else None
+
+    def upcoming_card(self):
+        """The card after this one, or None."""
+        return self.cards[self.index + 1] if self.index + 1 < len(self.cards) else None
+
+    def is_finished(self):
+        return self.index >= len(self.cards)
+
+    def show_answer(self):
+        """QUESTION_STATE -> ANSWER_STATE. Returns False if that isn't possible right now."""
+        if self.state != self.QUESTION_STATE or self.is_finished():
+            return False
+        self.state = self.ANSWER_STATE
+        return True
+
+    def mark(self, was_correct):
+        """Scores the revealed card and moves on. Returns False if the answer isn't shown yet."""
+        if self.state != self.ANSWER_STATE:
+            return False
+        if was_correct:
+            self.stats.increment_score()
+        self.next_card()
+        return True
+
+    def next_card(self):
+        """Moves on without scoring (a skipped or wrong card)."""
+        self.index += 1
+        self.state = self.QUESTION_STATE
+
+
+# --- Typed Answer Grading ---
+# In "typed answer" practice the app marks the answer for you.
+# Two scores are worked out and the higher one is used:
+#   * Edit similarity: how few single-letter changes turn the typed answer
+#     into the real one (so small typos still pass).
+#   * Token overlap: how many of the words match (so "Vinci Leonardo da" still passes).
+class AnswerGrader(object):
+    """Scores a typed answer against a card's answer from 0.0 to 1.0."""
+    def __init__(self, pass_mark=0.8):
+        self.pass_mark = pass_mark
+        # Expected answers are prepared once and reused. Practice sessions and
+        # re-grading the history check the same answers over and over.
+        self._prepared = {}
+
+    def _prepare(self, expected):
+        """Returns (normalized text, letter bitmasks, word set) for an expected answer."""
+        prepared = self._prepared.get(expected)
+        if prepared is None:
+            text = normalize_text(expected)
+            # For each letter, a bitmask of the positions where it appears.
+            # This is what lets edit_distance() handle a whole column at once.
+            masks = {}
+            bit = 1
+            for ch in text:
+                masks[ch] = masks.get(ch, 0) | bit
+                bit <<= 1
+            prepared = (text, masks, frozenset(text.split()))
+            if len(self._prepared) > 100000:
+                self._prepared.clear()  # Keep the cache from growing forever
+            self._prepared[expected] = prepared
+        return prepared
+
+    @staticmethod
+    def edit_distance(masks, length, text, start=0):
+        """
+        Levenshtein distance between `text` and a pattern of `length` characters.
+        With `start`, the pattern is the `length` characters from that position
+        of the text the masks were made from.
+
+        This is Myers' bit-parallel algorithm: Python ints are used as bit
+        vectors, so every character of `text` updates the whole column of the
+        usual edit-distance table in a handful of integer operations.
+        """
+        if length == 0:
+            return len(text)
+        all_bits = (1 << length) - 1
+        last_bit = 1 << (length - 1)
+        pv = all_bits  # Vertical +1 deltas
+        mv = 0         # Vertical -1 deltas
+        score = length
+        get = masks.get  # Looking the method up once makes the loop noticeably faster
+        for ch in text:
+            # Bits above the pattern are left in: carries and shifts only move
+            # upwards, so they never change the bits the score is read from
+            eq = get(ch, 0) >> start
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            if ph & last_bit:
+                score += 1
+            elif mh & last_bit:
+                score -= 1
+            ph = (ph << 1) | 1
+            pv = ((mh << 1) | ~(xv | ph)) & all_bits
+            mv = ph & xv
+        return score
+
+    def similarity(self, typed, expected):
+        """Returns the better of the edit similarity and the word overlap (0.0 to 1.0)."""
+        typed = normalize_text(typed)
+        return self._score(typed, set(typed.split()), self._prepare(expected))
+
+    def _score(self, typed, typed_words, prepared):
+        """similarity() for an already normalized typed answer and its word set."""
+        text, masks, expected_words = prepared
+        if typed == text:
+            return 1.0
+        if not typed or not text:
+            return 0.0
+
+        common = len(typed_words & expected_words)
+        token_score = common / (len(typed_words) + len(expected_words) - common)
+        # The edit distance is at least the difference in length, so when the
+        # word score is already as good as the best possible edit score, the
+        # slow edit distance can't change the result and is skipped.
+        text_length, typed_length = len(text), len(typed)
+        if text_length > typed_length:
+            longest, shortest = text_length, typed_length
+        else:
+            longest, shortest = typed_length, text_length
+        if token_score >= 1.0 - (longest - shortest) / longest:
+            return token_score
+
+        # A shared beginning and ending doesn't change the edit distance, so
+        # only the middle part that differs is run through edit_distance().
+        # For a one-letter typo, that is just a letter or two.
+        start = 0
+        while start < shortest and typed[start] == text[start]:
+            start += 1
+        end = 0
+        while end < shortest - start and typed[-1 - end] == text[-1 - end]:
+            end += 1
+        distance = self.edit_distance(masks, text_length - start - end, typed[start:typed_length - end], start)
+        edit_score = 1.0 - distance / longest
+        return edit_score if edit_score > token_score else token_score
+
+    def grade(self, typed, expected):
+        """Returns (score, passed) for one typed answer."""
+        score = self.similarity(typed, expected)
+        return score, score >= self.pass_mark
+
+    def grade_many(self, pairs):
+        """Grades an iterable of (typed, expected) pairs. Returns a list of (score, passed)."""
+        score_of = self._score
+        prepare = self._prepare
+        prepared = self._prepared
+        pass_mark = self.pass_mark
+        # A history has the same answers typed again and again, so each typed
+        # text is only normalized once and each (typed, expected) pair only graded once
+        normalized = {}
+        graded = {}
+        results = []
+        for pair in pairs:
+            result = graded.get(pair)
+            if result is None:
+                typed, expected = pair
+                found = normalized.get(typed)
+                if found is None:
+                    text = normalize_text(typed)
+                    found = normalized[typed] = (text, set(text.split()))
+                score = score_of(found[0], found[1], prepared.get(expected) or prepare(expected))
+                result = graded[pair] = (score, score >= pass_mark)
+            results.append(result)
+        return results
+
+
+def append_typed_answer(path, card, typed, score, passed):
+    """Adds one typed attempt to the history file (one JSON object per line)."""
+    record = {
+        'question': card.question,
+        'answer': card.answer,
+        'typed': typed,
+        'score': round(score, 3),
+        'passed': passed,
+        'time': int(time.time())
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def regrade_typed_answers(path, grader):
+    """
+    Re-grades every saved typed attempt with `grader` (e.g. after changing
+    the pass mark) and rewrites the history file with the new results.
+    Returns (total, passed).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    results = grader.grade_many((r.get('typed', ''), r.get('answer', '')) for r in records)
+    passed_count = 0
+    for record, (score, passed) in zip(records, results):
+        record['score'] = round(score, 3)
+        record['passed'] = passed
+        passed_count += passed
+
+    # Write to a temporary file first so a crash can't leave half a history file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+    return len(records), passed_count
+
+
+# --- Near-Duplicate Detection (MinHash + LSH) ---
+# Comparing every card with every other card is O(n^2), which is far too slow
+# for big decks. Instead we:
+#   1. Break each card into small overlapping pieces of text ("shingles").
+#   2. Squash each card's shingles into a short "MinHash signature".
+#      Two cards with similar shingles get similar signatures.
+#   3. Cut the signature into "bands". Cards that match on a whole band land
+#      in the same bucket and become *candidate* pairs (Locality-Sensitive Hashing).
+#   4. Only candidate pairs are checked properly, so the work stays roughly linear.
+_HASH_MIXER = 0x9E3779B97F4A7C15
+_MASK_64 = (1 << 64) - 1
+
+
+class NearDuplicateFinder(object):
+    """Finds groups of paraphrased cards using shingling, MinHash and LSH."""
+    # How many shingle sets find_groups() keeps around for reuse
+    RECENT_SHINGLE_SETS = 4096
+
+    def __init__(self, threshold=0.5, bands=20, rows=3, shingle_size=3, remember=False):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        # With remember=True the band keys of every card are kept between runs,
+        # so running again after a few edits only re-hashes the edited cards
+        self.remember = remember
+        # Flat arrays, not a dict, so remembering costs a few bytes per card:
+        # (sorted card ids, card position of each id, crc32 of each card's text, band keys)
+        self._remembered = (array('Q'), array('I'), array('I'), array('I'))
+
+    def shingle_texts(self, card):
+        """Returns the set of character shingles (3-letter pieces) of a card's question and answer."""
+        k = self.shingle_size
+        question = normalize_text(card.question)
+        answer = normalize_text(card.answer)
+        result = {question[i:i + k] for i in range(max(len(question) - k + 1, 1))}
+        # Answer shingles start with "\n" (normalized text never contains one), so
+        # "paris" in a question and "paris" in an answer count as different shingles.
+        result.update("\n" + answer[i:i + k] for i in range(max(len(answer) - k + 1, 1)))
+        return result
+
+    def shingles(self, card):
+        """Returns the set of hashed shingles used for the MinHash signature."""
+        # zlib.crc32 is used (not hash()) so results are the same on every run.
+        # Multiplying by a large odd constant spreads similar CRCs across all 64 bits,
+        # otherwise near-identical shingles get near-identical hashes.
+        return {(zlib.crc32(text.encode('utf-8')) * _HASH_MIXER) & _MASK_64 for text in self.shingle_texts(card)}
+
+    def similarity(self, card_a, card_b):
+        """
+        Exact Jaccard similarity of two cards' shingle sets (0.0 to 1.0).
+        The plain strings are compared, which skips the hashing and can't collide.
+        """
+        return self._jaccard(self.shingle_texts(card_a), self.shingle_texts(card_b))
+
+    @staticmethod
+    def _jaccard(a, b):
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def signature(self, card):
+        """
+        Returns the card's MinHash signature (a list of bands * rows ints).
+
+        Instead of running every hash function over every shingle, we use
+        "one permutation hashing": each shingle is dropped into one of the
+        signature slots and each slot keeps the smallest hash it sees.
+        That is a single pass over the shingles, which is much faster.
+        """
+        size = self.bands * self.rows
+        slots = [_MASK_64] * size
+        for h in self.shingles(card):
+            slot = (h >> 32) % size
+            if h < slots[slot]:
+                slots[slot] = h
+
+        # Short cards leave some slots empty. Fill each empty slot from the next
+        # non-empty slot to its right ("densification"), adding the distance so
+        # filled slots don't all look identical. Every card uses the same rule,
+        # so similar cards still end up with matching slots.
+        if _MASK_64 in slots:
+            filled = [i for i in range(size) if slots[i] != _MASK_64]
+            if filled:
+                original = list(slots)
+                for i in range(size):
+                    if original[i] == _MASK_64:
+                        distance = 1
+                        while original[(i + distance) % size] == _MASK_64:
+                            distance += 1
+                        slots[i] = (original[(i + distance) % size] + distance * _HASH_MIXER) & _MASK_64
+        return slots
+
+    def _band_keys(self, card):
+        """Returns one hashed key per band of the card's MinHash signature."""
+        sig = self.signature(card)
+        # Each band takes every `bands`-th slot instead of neighbouring slots,
+        # because densified neighbours often copy the same value.
+        return [hash(tuple(sig[band::self.bands])) for band in range(self.bands)]
+
+    def find_groups(self, cards):
+        """
+        Returns a list of groups, each a sorted list of indexes into `cards`
+        whose members are at least `threshold` similar to another member.
+        """
+        n = len(cards)
+        # Band keys are trimmed to 32 bits and stored in a flat array (4 bytes each),
+        # which is much smaller than keeping a Python list of tuples per card.
+        # The odd accidental 32-bit clash is harmless: every candidate is checked below.
+        band_keys = array('I')
+        if self.remember:
+            # A card's old band keys are reused if it is the same card object
+            # with the same text (crc32) as last time; anything else is hashed again
+            known_ids, known_slots, known_prints, known_keys = self._remembered
+            bands = self.bands
+            ids, prints = array('Q'), array('I')
+            for card in cards:
+                fingerprint = zlib.crc32((card.question + "\0" + card.answer).encode('utf-8'))
+                at = bisect.bisect_left(known_ids, id(card))
+                slot = known_slots[at] if at < len(known_ids) and known_ids[at] == id(card) else None
+                if slot is not None and known_prints[slot] == fingerprint:
+                    band_keys.extend(known_keys[slot * bands:(slot + 1) * bands])
+                else:
+                    band_keys.extend(key & 0xFFFFFFFF for key in self._band_keys(card))
+                ids.append(id(card))
+                prints.append(fingerprint)
+            # Only cards still in the deck are kept, so deleted cards are forgotten
+            order = sorted(range(n), key=ids.__getitem__)
+            self._remembered = (array('Q', (ids[i] for i in order)), array('I', order), prints, band_keys)
+        else:
+            for card in cards:
+                band_keys.extend(key & 0xFFFFFFFF for key in self._band_keys(card))
+
+        # Union-find ("disjoint set") so matched cards merge into groups
+        parent = array('l', range(n))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]  # Path halving keeps the trees flat
+                i = parent[i]
+            return i
+
+        # Shingle sets of the most recently compared cards. A bucket's first card
+        # is compared with every other card in its bucket, so this way it is only
+        # shingled once. Only the last few thousand are kept, so memory stays bounded.
+        recent = OrderedDict()
+
+        def shingles_of(i):
+            found = recent.get(i)
+            if found is None:
+                found = recent[i] = self.shingle_texts(cards[i])
+                if len(recent) > self.RECENT_SHINGLE_SETS:
+                    recent.popitem(last=False)
+            else:
+                recent.move_to_end(i)
+            return found
+
+        # Pairs already checked and found *not* similar enough. They often share
+        # a bucket in several bands, and there is no need to check them again.
+        rejected = set()
+
+        grouped = set()
+        # Buckets are built one band at a time, so only one bucket dict
+        # is ever alive in memory.
+        for band in range(self.bands):
+            buckets = {}
+            for i in range(n):
+                first = buckets.setdefault(band_keys[i * self.bands + band], i)
+                if first == i:
+                    continue
+                root_a, root_b = find(first), find(i)
+                if root_a == root_b:
+                    continue  # Already in the same group, no need to check again
+                pair = first * n + i
+                if pair in rejected:
+                    continue
+                if self._jaccard(shingles_of(first), shingles_of(i)) >= self.threshold:
+                    parent[root_b] = root_a
+                    grouped.add(first)
+                    grouped.add(i)
+                else:
+                    rejected.add(pair)
+
+        groups = {}
+        for i in grouped:
+            groups.setdefault(find(i), []).append(i)
+        return sorted((sorted(g) for g in groups.values()), key=lambda g: g[0])
+
+
+# --- Find and Replace ---
+# Changes the same text in many cards at once, e.g. fixing a typo that
+# appears in thousands of cards. Plain text uses str.replace (very fast);
+# regular expressions and "ignore case" use the re module.
+class FindReplace(object):
+    """Finds and replaces text in the question and/or answer of every card."""
+    def __init__(self, find, replacement, regex=False, ignore_case=False, fields=('question', 'answer')):
+        if not find:
+            raise ValueError("Enter the text to find.")
+        if not fields:
+            raise ValueError("Choose the question, the answer or both.")
+        self.find = find
+        self.replacement = replacement
+        self.fields = tuple(fields)
+        self.pattern = None
+        if regex or ignore_case:
+            # re.error is raised here if the regular expression is invalid...
+            self.pattern = re.compile(find if regex else re.escape(find), re.IGNORECASE if ignore_case else 0)
+            if not regex:
+                # Plain text: a backslash in the replacement means a backslash, not a group
+                self.replacement = replacement.replace('\\', '\\\\')
+            # ...or if the replacement is not valid, e.g. it uses \3 but there are only two groups
+            self.pattern.sub(self.replacement, "")
+
+    def replace_text(self, text):
+        """Returns `text` with every match replaced."""
+        if self.pattern is None:
+            return text.replace(self.find, self.replacement) if self.find in text else text
+        # search() is much cheaper than sub() when nothing matches, which is most cards
+        if self.pattern.search(text) is None:
+            return text
+        return self.pattern.sub(self.replacement, text)
+
+    def changes(self, cards):
+        """Returns a list of (card, {field: new value}) for every card that would change."""
+        replace_text = self.replace_text
+        result = []
+        for card in cards:
+            new_values = None
+            for name in self.fields:
+                old = getattr(card, name)
+                new = replace_text(old)
+                if new != old:
+                    if new_values is None:
+                        new_values = {}
+                    new_values[name] = new
+            if new_values:
+                result.append((card, new_values))
+        return result
+
+    @staticmethod
+    def emptied(changes):
+        """Counts the changes that would leave a card with an empty question or answer."""
+        return sum(1 for card, new_values in changes if not all(value.strip() for value in new_values.values()))
+
+
+# --- Undo / Redo ---
+# Every change to the deck is wrapped in a small "command" object that knows
+# how to do itself and how to undo itself. Commands only remember what
+# changed (one card, or just the edited fields), never a copy of the whole deck.
+class DeckCommand(ABC):
+    """Abstract base class for a reversible change to the deck."""
+    description = "change"
+
+    @abstractmethod
+    def apply(self, deck):
+        """Makes the change. `deck` is the object that owns the `flashcards` list."""
+        pass
+
+    @abstractmethod
+    def revert(self, deck):
+        """Undoes the change."""
+        pass
+
+
+class AddCardCommand(DeckCommand):
+    description = "add card"
+
+    def __init__(self, card):
+        self.card = card
+
+    def apply(self, deck):
+        deck.flashcards.append(self.card)
+
+    def revert(self, deck):
+        try:
+            deck.flashcards.remove(self.card)
+        except ValueError:
+            pass  # Already gone (e.g. deleted by another window)
+
+
+class EditCardCommand(DeckCommand):
+    description = "edit card"
+
+    def __init__(self, card, **new_values):
+        self.card = card
+        # Only the fields that actually change are stored, as (old, new) pairs
+        self.changes = {name: (getattr(card, name), value)
+                        for name, value in new_values.items() if getattr(card, name) != value}
+
+    def apply(self, deck):
+        for name, (old, new) in self.changes.items():
+            setattr(self.card, name, new)
+
+    def revert(self, deck):
+        for name, (old, new) in self.changes.items():
+            setattr(self.card, name, old)
+
+
+class BatchEditCommand(DeckCommand):
+    """Edits to many cards at once (e.g. a find and replace), undone as one step."""
+    description = "find and replace"
+
+    def __init__(self, changes):
+        # `changes` is a list of (card, {field: new value}) pairs
+        self.edits = [EditCardCommand(card, **new_values) for card, new_values in changes]
+
+    def apply(self, deck):
+        for edit in self.edits:
+            edit.apply(deck)
+
+    def revert(self, deck):
+        for edit in reversed(self.edits):
+            edit.revert(deck)
+
+
+class DeleteCardsCommand(DeckCommand):
+    description = "delete card"
+
+    def __init__(self, cards):
+        self.cards = list(cards)
+        self.positions = []  # (index, card) pairs, filled in by apply()
+
+    def apply(self, deck):
+        wanted = set(map(id, self.cards))
+        cards = deck.flashcards
+        self.positions = [(i, card) for i, card in enumerate(cards) if id(card) in wanted]
+        # Delete from the back so the earlier indexes stay correct
+        for i, card in reversed(self.positions):
+            del cards[i]
+
+    def revert(self, deck):
+        cards = deck.flashcards
+        for i, card in self.positions:
+            cards.insert(min(i, len(cards)), card)
+
+
+class ClearCardsCommand(DeckCommand):
+    description = "delete all cards"
+
+    def __init__(self):
+        self.old_cards = None
+
+    def apply(self, deck):
+        # Instead of copying the deck, the whole list object is handed to this
+        # command and the deck gets a fresh empty list, so even a huge deck
+        # costs no extra memory.
+        self.old_cards = deck.flashcards
+        deck.flashcards = []
+
+    def revert(self, deck):
+        # The old cards go back in front of the *current* list instead of
+        # replacing it. Cards can arrive after the clear without going through
+        # the undo history (merged in from another window, or reloaded from
+        # the deck service), and swapping the lists would drop them.
+        deck.flashcards[:0] = self.old_cards
+        self.old_cards = None
+
+
+class CommandLog(object):
+    """Undo and redo stacks of DeckCommands."""
+    def __init__(self, deck, limit=100):
+        self.deck = deck
+        # A deque with maxlen forgets the oldest command once the limit is hit
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+
+    def do(self, command):
+        """Applies a new command. Any redo history is thrown away, like in a text editor."""
+        command.apply(self.deck)
+        self._undo.append(command)
+        self._redo.clear()
+        return command
+
+    def undo(self):
+        """Undoes the last command and returns it (None if there is nothing to undo)."""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.revert(self.deck)
+        self._redo.append(command)
+        return command
+
+    def redo(self):
+        """Re-applies the last undone command and returns it (None if there is nothing to redo)."""
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.apply(self.deck)
+        self._undo.append(command)
+        return command
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+
+# --- Deck Service (headless, shared deck) ---
+# Runs without any window so several study stations and scripts can share
+# one deck. It speaks a tiny JSON-over-HTTP API using only asyncio:
+#   GET    /cards            list all cards (add ?q=text to search)
+#   GET    /cards/<id>       get one card
+#   POST   /cards            add a card            body: {"question": ..., "answer": ...}
+#   PUT    /cards/<id>       change a card         body: any card fields
+#   DELETE /cards/<id>       delete a card
+#   POST   /batch            several add/update/delete operations in one request
+#   GET    /next             the next card due for practice
+# Writes only change the cards in memory. Saving to disk is batched:
+# the file is written once, shortly after a burst of changes.
+class DeckServiceError(Exception):
+    """Raised by DeckClient when the service answers with an error."""
+    pass
+
+
+class DeckService(object):
+    """Serves one deck file to many clients at once."""
+    def __init__(self, data_file, flush_delay=0.5):
+        self.data_file = data_file
+        self.flush_delay = flush_delay
+
+        # Cards are kept by id so clients can refer to them directly.
+        # Dicts remember insertion order, so the deck order is kept too.
+        self.cards = {}
+        self._next_id = 1
+        # DeckFile gives the service the same safe, merging saves as the app
+        self.deck_file = DeckFile(data_file)
+        if os.path.exists(data_file):
+            for card in self.deck_file.load()[0]:
+                self._insert(card)
+
+        # Practice queue for /next: the deck shuffled, one card at a time
+        self._due = deque()
+
+        self._dirty = False
+        self._flush_handle = None
+        self._flush_task = None  # The save started by the timer, if any
+        self._flush_lock = None  # Created inside the event loop
+
+    def _insert(self, card):
+        card_id = self._next_id
+        self._next_id += 1
+        self.cards[card_id] = card
+        return card_id
+
+    @staticmethod
+    def _card_json(card_id, card):
+        data = card.to_dict()
+        data['id'] = card_id
+        return data
+
+    # --- Batched saving ---
+
+    def _mark_dirty(self):
+        """Schedules one save for a burst of changes instead of one save per change."""
+        self._dirty = True
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        """Writes the deck to disk if anything changed since the last write."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()  # In case we were called directly, not by the timer
+            self._flush_handle = None
+        # A save the timer already started finishes first, so none is left
+        # half-done when the service stops
+        task = self._flush_task
+        if task is not None and task is not asyncio.current_task():
+            await task
+        if not self._dirty:
+            return
+        async with self._flush_lock:
+            self._dirty = False
+            # Shallow copies, so edits that arrive while the file is being
+            # written can't change what is written half-way through.
+            snapshot = [copy.copy(card) for card in self.cards.values()]
+            written = Counter(card.key() for card in snapshot)
+            # The slow disk write runs in a worker thread so requests keep being answered
+            merged = await asyncio.get_running_loop().run_in_executor(None, self.deck_file.save, snapshot)
+            if merged:
+                self._apply_outside_changes(written, snapshot)
+
+    def _apply_outside_changes(self, written, merged_cards):
+        """Brings in cards that an app window added or deleted in the deck file directly."""
+        merged_keys = Counter(card.key() for card in merged_cards)
+        for card in merged_cards:
+            key = card.key()
+            if merged_keys[key] > written[key]:
+                merged_keys[key] -= 1
+                self._insert(card)
+        removed = written - Counter(card.key() for card in merged_cards)
+        for card_id, card in list(self.cards.items()):
+            key = card.key()
+            if removed[key] > 0:
+                removed[key] -= 1
+                del self.cards[card_id]
+
+    # --- Operations ---
+
+    @staticmethod
+    def _new_card(fields):
+        """Builds a card from request fields, raising ValueError if it isn't valid."""
+        card = card_from_dict(fields)
+        if not (card.question and card.answer):
+            raise ValueError("Both 'question' and 'answer' are required")
+        return card
+
+    def _updated_card(self, card, fields):
+        """Returns a new card: `card` with `fields` changed (raises ValueError if invalid)."""
+        if not isinstance(fields, dict):
+            raise ValueError("'card' must be an object")
+        merged = card.to_dict()
+        merged.update(fields)
+        merged.pop('id', None)
+        return self._new_card(merged)
+
+    def add(self, fields):
+        card = self._new_card(fields)
+        card_id = self._insert(card)
+        self._mark_dirty()
+        return self._card_json(card_id, card)
+
+    def update(self, card_id, fields):
+        updated = self._updated_card(self.cards[card_id], fields)
+        self.cards[card_id] = updated
+        self._mark_dirty()
+        return self._card_json(card_id, updated)
+
+    def delete(self, card_id):
+        del self.cards[card_id]
+        self._mark_dirty()
+        return {'id': card_id, 'deleted': True}
+
+    def search(self, text):
+        text = text.lower()
+        return [self._card_json(card_id, card) for card_id, card in self.cards.items()
+                if text in card.question.lower() or text in card.answer.lower()]
+
+    def next_due(self):
+        """Returns the next card in a shuffled pass through the deck."""
+        while self._due:
+            card_id = self._due.popleft()
+            if card_id in self.cards:  # Skip cards deleted since the pass started
+                return self._card_json(card_id, self.cards[card_id])
+        if not self.cards:
+            return None
+        # Start a new shuffled pass, just like PracticePage.refresh()
+        ids = list(self.cards)
+        random.shuffle(ids)
+        self._due.extend(ids)
+        return self.next_due()
+
+    def batch(self, operations):
+        """
+        Applies a list of {"op": "add"|"update"|"delete", ...} operations, all or nothing.
+        Every operation is checked before anything changes, so a bad one (400)
+        leaves the deck untouched. A card that another client already deleted
+        is not an error: its update comes back as {"id": ..., "error": "No such card"}
+        and its delete as {"id": ..., "deleted": false}, and the rest still apply.
+        """
+        if not isinstance(operations, list):
+            raise ValueError("A batch must be a list of operations")
+
+        # 1. Check every operation and work out the new cards, without touching the deck
+        planned = []
+        pending = {}  # id -> the card after earlier operations in this batch (None = deleted)
+        for number, operation in enumerate(operations, start=1):
+            if not isinstance(operation, dict):
+                raise ValueError(f"Operation {number} is not an object")
+            op = operation.get('op')
+            if op == 'add':
+                planned.append(('add', None, self._new_card(operation.get('card', {}))))
+                continue
+            if op not in ('update', 'delete'):
+                raise ValueError(f"Unknown batch operation: {op!r}")
+            if 'id' not in operation:
+                raise ValueError(f"Operation {number} ({op}) needs an 'id'")
+            card_id = int(operation['id'])
+            current = pending.get(card_id, self.cards.get(card_id))
+            if op == 'update':
+                if current is None:
+                    planned.append(('conflict', card_id, None))
+                else:
+                    pending[card_id] = self._updated_card(current, operation.get('card', {}))
+                    planned.append(('update', card_id, pending[card_id]))
+            else:
+                planned.append(('delete', card_id, current is not None))
+                pending[card_id] = None
+
+        # 2. Apply them (nothing below can fail half-way)
+        results = []
+        for action, card_id, value in planned:
+            if action == 'add':
+                card_id = self._insert(value)
+                results.append(self._card_json(card_id, value))
+            elif action == 'update':
+                self.cards[card_id] = value
+                results.append(self._card_json(card_id, value))
+            elif action == 'delete':
+                if value:
+                    del self.cards[card_id]
+                results.append({'id': card_id, 'deleted': value})
+            else:
+                results.append({'id': card_id, 'error': "No such card"})
+        if any(action in ('add', 'update') or (action == 'delete' and value) for action, _, value in planned):
+            self._mark_dirty()
+        return results
+
+    # --- HTTP ---
+
+    def dispatch(self, method, target, body):
+        """Routes one request. Returns (status code, JSON-able payload)."""
+        url = urllib.parse.urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            data = json.loads(body) if body else {}
+            if parts == ['cards']:
+                if method == 'GET':
+                    query = urllib.parse.parse_qs(url.query).get('q')
+                    if query:
+                        return 200, self.search(query[0])
+                    return 200, [self._card_json(card_id, card) for card_id, card in self.cards.items()]
+                if method == 'POST':
+                    return 201, self.add(data)
+            elif len(parts) == 2 and parts[0] == 'cards':
+                card_id = int(parts[1])
+                if method == 'GET':
+                    return 200, self._card_json(card_id, self.cards[card_id])
+                if method == 'PUT':
+                    return 200, self.update(card_id, data)
+                if method == 'DELETE':
+                    return 200, self.delete(card_id)
+            elif parts == ['batch'] and method == 'POST':
+                return 200, self.batch(data)
+            elif parts == ['next'] and method == 'GET':
+                card = self.next_due()
+                if card is None:
+                    return 404, {'error': "The deck is empty"}
+                return 200, card
+            else:
+                return 404, {'error': f"Unknown path: {url.path}"}
+            return 405, {'error': f"{method} is not allowed on {url.path}"}
+        except KeyError:
+            return 404, {'error': "No such card"}
+        except (ValueError, TypeError, AttributeError) as e:
+            # Bad JSON, a non-numeric id or missing fields
+            return 400, {'error': str(e)}
+
+    async def _handle_connection(self, reader, writer):
+        """Answers requests on one connection until the client hangs up (keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+                status, payload = self.dispatch(method, target, body)
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + content
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # Client went away or sent something that isn't HTTP
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Starts listening and returns the asyncio server (port 0 picks a free port)."""
+        self._flush_lock = asyncio.Lock()
+        # A large backlog lets hundreds of local clients connect at the same moment
+        return await asyncio.start_server(self._handle_connection, host, port, backlog=1024)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """Runs the service until it is stopped (e.g. Ctrl+C), then saves any pending changes."""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.flush()
+
+
+_HTTP_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+class DeckClient(object):
+    """
+    Talks to a DeckService. The GUI uses this in client mode.
+    It remembers what the service last sent, so sync() only sends
+    the cards that were added, changed or deleted.
+    """
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._synced = {}  # id -> card dict as last seen on the service
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise DeckServiceError(message)
+
+    def _remember(self, card, data):
+        card.remote_id = data['id']
+        self._synced[data['id']] = card.to_dict()
+
+    def list_cards(self, reuse=None):
+        """
+        Returns all cards as Flashcard objects (each tagged with its service id).
+        Cards already in `reuse` are updated and returned instead of new objects.
+        """
+        existing = {}
+        for card in reuse or []:
+            if getattr(card, 'remote_id', None) is not None:
+                existing[card.remote_id] = card
+        self._synced = {}
+        cards = []
+        for data in self._request('GET', '/cards'):
+            fresh = card_from_dict(data)
+            card = existing.get(data['id'])
+            if card is None:
+                card = fresh
+            else:
+                card.__dict__.update(fresh.__dict__)
+            self._remember(card, data)
+            cards.append(card)
+        return cards
+
+    def search(self, text):
+        return self._request('GET', '/cards?' + urllib.parse.urlencode({'q': text}))
+
+    def add(self, card):
+        return self._request('POST', '/cards', card.to_dict())
+
+    def update(self, card_id, fields):
+        return self._request('PUT', f'/cards/{card_id}', fields)
+
+    def delete(self, card_id):
+        return self._request('DELETE', f'/cards/{card_id}')
+
+    def next_card(self):
+        return self._request('GET', '/next')
+
+    def sync(self, cards):
+        """
+        Sends every add/change/delete since the last sync in one batch request.
+        If another station deleted a card that we changed, our change wins:
+        the card is added back as a new card.
+        """
+        operations = []
+        new_cards = []
+        seen = set()
+        for card in cards:
+            card_id = getattr(card, 'remote_id', None)
+            if card_id is None or card_id not in self._synced:
+                # A new card, or one brought back (e.g. by Undo) after the service deleted it
+                operations.append({'op': 'add', 'card': card.to_dict()})
+                new_cards.append(card)
+            else:
+                seen.add(card_id)
+                if self._synced[card_id] != card.to_dict():
+                    operations.append({'op': 'update', 'id': card_id, 'card': card.to_dict()})
+        for card_id in self._synced:
+            if card_id not in seen:
+                operations.append({'op': 'delete', 'id': card_id})
+        if not operations:
+            return
+
+        results = self._request('POST', '/batch', operations)
+
+        # Remember the new state so the next sync only sends new changes
+        for card_id in set(self._synced) - seen:
+            del self._synced[card_id]
+        added = iter(new_cards)
+        conflicts = False
+        for operation, data in zip(operations, results):
+            if operation['op'] == 'add':
+                self._remember(next(added), data)
+            elif operation['op'] == 'update':
+                if 'error' in data:
+                    # Deleted by another station: forget the id so it is added again below
+                    del self._synced[operation['id']]
+                    conflicts = True
+                else:
+                    self._synced[data['id']] = operation['card']
+        if conflicts:
+            self.sync(cards)
+
+
 # --- Main Application Controller ---
 # This class *is* the main window (it inherits from tk.Tk).
 # It controls which "page" (frame) is currently visible.
 class FlashcardApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, data_file="flashcards.json", server_url=None):
         super().__init__()
         self.title("Flashcard Master")
         self.configure(bg=COLOR_PRIMARY_DARK) 
@@ -122,9 +1984,24 @@ class FlashcardApp(tk.Tk):
 
         self.geometry(f"{window_width}x{window_height}+{center_x}+{center_y}")
         
-        self.data_file = "flashcards.json"
+        self.data_file = data_file
+        # When a server URL is given, the deck is shared through a DeckService
+        # and this window is just one of its clients.
+        self.client = DeckClient(server_url) if server_url else None
+        # Safe access to the deck file when several windows have it open
+        self.deck_file = DeckFile(data_file)
+        # Older versions of the deck, stored as compressed deltas
+        self.versions = DeckHistory(data_file)
+        # Images attached to cards, and a cache of the decoded ones
+        self.media = MediaStore(data_file)
+        self.media_cache = MediaCache(self, self.media)
+        # Typed answers are kept next to the deck, e.g. "flashcards_typed_answers.jsonl"
+        self.typed_log_file = deck_stem(data_file) + "_typed_answers.jsonl"
         # self.flashcards is NOW A LIST of Flashcard objects
         self.flashcards = self.load_flashcards() 
+        # Every change goes through the CommandLog so it can be undone
+        self.history = CommandLog(self)
+        self._save_job = None  # Pending "save soon" timer (see schedule_save)
         
         self.title_font = font.Font(family="Helvetica", size=28, weight="bold")
         self.button_font = font.Font(family="Helvetica", size=14, weight="bold")
@@ -164,7 +2041,24 @@ class FlashcardApp(tk.Tk):
         self.frames["PracticePage"] = practice_page
         practice_page.grid(row=0, column=0, sticky="nsew")
 
+
+        duplicates_page = DuplicatesPage(parent=container, controller=self)
+        self.frames["DuplicatesPage"] = duplicates_page
+        duplicates_page.grid(row=0, column=0, sticky="nsew")
+
+
+        replace_page = ReplacePage(parent=container, controller=self)
+        self.frames["ReplacePage"] = replace_page
+        replace_page.grid(row=0, column=0, sticky="nsew")
+
+        self.current_frame = None
         self.show_frame("MainMenu")
+
+        # --- Undo / Redo shortcuts ---
+        self.bind_all("<Control-z>", self.undo)
+        self.bind_all("<Control-y>", self.redo)
+        # Make sure a pending save isn't lost when the window is closed
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # 2. Now that everything is built and ready, un-hide the window.
         self.deiconify()
@@ -172,10 +2066,57 @@ class FlashcardApp(tk.Tk):
     def show_frame(self, page_name):
         """Shows the frame with the given page_name."""
         frame = self.frames[page_name]
+        if self.client is not None and page_name == "MainMenu":
+            # Client mode: pick up changes made by other stations
+            self.flashcards = self.load_flashcards()
         # Call the page's own 'refresh' method *before* showing it
         frame.refresh() 
         # This brings the desired frame to the front of the stack
         frame.tkraise()
+        self.current_frame = frame
+
+    def undo(self, event=None):
+        """Undoes the last change to the deck (Ctrl+Z)."""
+        return self._undo_or_redo(self.history.undo, event)
+
+    def redo(self, event=None):
+        """Re-does the last undone change (Ctrl+Y)."""
+        return self._undo_or_redo(self.history.redo, event)
+
+    def _undo_or_redo(self, action, event):
+        # While typing in a text box, Ctrl+Z belongs to the text box, not the deck
+        if event is not None and isinstance(self.focus_get(), (tk.Text, tk.Entry)):
+            return None
+        if action() is None:
+            self.bell()
+            return "break"
+        self.schedule_save()
+        self.refresh_main_menu_count()
+        # Lists on the Edit/Delete/Duplicates pages need rebuilding too.
+        # Practice is left alone so the current session isn't restarted.
+        if self.current_frame is not None and not isinstance(self.current_frame, (MainMenu, PracticePage, AddPage)):
+            self.current_frame.refresh()
+        return "break"
+
+    def schedule_save(self, delay=500):
+        """
+        Saves a moment from now instead of right away. Pressing Ctrl+Z ten
+        times quickly then costs a single save instead of ten.
+        """
+        if self._save_job is not None:
+            self.after_cancel(self._save_job)
+        self._save_job = self.after(delay, self._run_scheduled_save)
+
+    def _run_scheduled_save(self):
+        self._save_job = None
+        self.save_flashcards()
+
+    def on_close(self):
+        """Runs any pending save before the window closes."""
+        if self._save_job is not None:
+            self.after_cancel(self._save_job)
+            self._run_scheduled_save()
+        self.destroy()
 
     def show_frame_if_cards(self, page_name):
         # A simple check to stop users from practicing/editing/deleting 0 cards
@@ -204,6 +2145,15 @@ class FlashcardApp(tk.Tk):
         - Logic from the old `from_dict` method is now here.
         - Automatically migrates old dict-based {q: a} format.
         """
+        if self.client is not None:
+            # Client mode: the deck lives in the service, not in a local file
+            try:
+                # Reusing our existing card objects keeps the undo history valid
+                return self.client.list_cards(reuse=getattr(self, 'flashcards', None))
+            except (DeckServiceError, IOError) as e:
+                messagebox.showerror("Load Error", f"Could not reach the deck service: {e}")
+                return []
+
         if not os.path.exists(self.data_file):
             # No file, create defaults from list of dicts
             default_data = self.get_default_cards()
@@ -222,31 +2172,9 @@ class FlashcardApp(tk.Tk):
             return loaded_cards
         
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            loaded_cards = []
-            migrated = False
-
-            if isinstance(data, dict):
-                # --- MIGRATION LOGIC ---
-                # This handles the old {question: answer} format
-                loaded_cards = [Flashcard(q, a) for q, a in data.items()]
-                migrated = True
-            elif isinstance(data, list):
-                # This handles the new format (a list of dicts)
-                # We manually do the work of creating Flashcard objects
-                for item in data:
-                    loaded_cards.append(
-                        Flashcard(
-                            question=item.get('question', ''),
-                            answer=item.get('answer', '')
-                        )
-                    )
-            else:
-                # File is corrupt or in a format we don't recognize
-                messagebox.showerror("Load Error", "Unrecognized file format. Loading defaults.")
-                raise json.JSONDecodeError("Data is not a valid list or dict", "", 0)
+            # read_deck_file() raises ValueError if the file is corrupt
+            # or in a format we don't recognize
+            loaded_cards, migrated = self.deck_file.load()
 
             if migrated:
                 # If we migrated the old format, save the file back in the *new* format
@@ -255,35 +2183,43 @@ class FlashcardApp(tk.Tk):
 
             return loaded_cards
 
-        except (json.JSONDecodeError, IOError, Exception) as e:
+        except ValueError as e:
+            # The file is damaged (json.JSONDecodeError is a kind of ValueError).
+            # Keep it instead of overwriting it, in case it can be fixed by hand.
+            backup_file = self.data_file + ".bad"
+            try:
+                os.replace(self.data_file, backup_file)
+            except OSError:
+                backup_file = None
+            messagebox.showerror("Load Error", f"Failed to read '{self.data_file}'. Error: {e}. Loading defaults."
+                                 + (f"\nThe unreadable file was kept as '{backup_file}'." if backup_file else ""))
+        except IOError as e:
+            # The file is probably fine, we just can't read it right now: leave it alone
             messagebox.showerror("Load Error", f"Failed to read '{self.data_file}'. Error: {e}. Loading defaults.")
-            # If anything fails, load defaults so the app doesn't crash
-            default_data = self.get_default_cards()
-            loaded_cards = []
-            for item in default_data:
-                loaded_cards.append(
-                    Flashcard(
-                        question=item.get('question', ''),
-                        answer=item.get('answer', '')
-                    )
-                )
-            self.save_flashcards(loaded_cards) # Save defaults
-            return loaded_cards
+
+        # Load defaults so the app doesn't crash. They are *not* saved here:
+        # other open windows would take an empty-looking deck file as "every card
+        # was deleted" and merge that into their own decks. They are only written
+        # once the user actually changes something.
+        return [card_from_dict(item) for item in self.get_default_cards()]
 
 
     def save_flashcards(self, cards=None):
         """Saves the given list of Flashcard objects to the JSON file."""
         cards_to_save = cards if cards is not None else self.flashcards
         
-        # Convert our list[Flashcard] back into a list[dict]
-        # The 'card.to_dict()' method comes from our Flashcard class
-        data_to_save = [card.to_dict() for card in cards_to_save]
-        
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                # json.dump writes the data to the file
-                # indent=2 makes the file human-readable (pretty-prints it)
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+            if self.client is not None:
+                # Client mode: send only what changed to the deck service
+                self.client.sync(cards_to_save)
+            else:
+                # DeckFile merges in changes saved by other open windows,
+                # and updates our list in place with the merged result
+                if self.deck_file.save(cards_to_save) and hasattr(self, 'frames'):
+                    self.refresh_main_menu_count()
+                self.record_version(cards_to_save)
+        except DeckServiceError as e:
+            messagebox.showerror("Save Error", f"The deck service rejected the save: {e}")
         except PermissionError:
             messagebox.showerror("Save Error", f"Failed to save flashcards to '{self.data_file}'. Check file permissions.")
         except IOError as e:
@@ -292,6 +2228,15 @@ class FlashcardApp(tk.Tk):
              messagebox.showerror("Save Error", f"An unexpected error occurred during save: {e}")
 
 
+    def record_version(self, cards):
+        """Keeps a version of the deck to roll back to (at most once an hour)."""
+        try:
+            self.versions.maybe_record(cards)
+        except (IOError, ValueError) as e:
+            # The deck itself was saved fine, so this is only a warning
+            messagebox.showwarning("History Error", f"Could not record a version of the deck: {e}")
+
+
 # --- Abstract Base Page ---
 # This is an "abstract" class, like a template for our other pages.
 # It says: "Any class that inherits from me *must* be a tk.Frame
@@ -322,16 +2267,95 @@ class FormMixin(object):
         q_text = tk.Text(parent_frame, height=5, font=('Helvetica', 11), bg=COLOR_CARD_BG, 
                          fg=COLOR_TEXT_DARK, padx=10, pady=10, borderwidth=1, relief="solid")
         q_text.pack(fill='x', padx=30)
+        self.q_media = self.create_media_row(parent_frame)
         
         tk.Label(parent_frame, text="Answer:", font=('Helvetica', 12, 'bold'),
                 bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK).pack(anchor='w', padx=30, pady=(20, 5)) 
         
         a_text = tk.Text(parent_frame, height=5, font=('Helvetica', 11), bg=COLOR_CARD_BG, 
                          fg=COLOR_TEXT_DARK, padx=10, pady=10, borderwidth=1, relief="solid")
-        a_text.pack(fill='x', padx=30, pady=(0, 30)) 
+        a_text.pack(fill='x', padx=30) 
+        self.a_media = self.create_media_row(parent_frame, pady=(5, 30))
         
         return q_text, a_text
 
+    def create_media_row(self, parent_frame, pady=(5, 0)):
+        """Creates an "Attach Image" row with thumbnails. Returns the MediaStrip."""
+        row = tk.Frame(parent_frame, bg=COLOR_CARD_BG)
+        row.pack(fill='x', padx=30, pady=pady)
+        strip = MediaStrip(row, self.controller.media_cache, 80, 60)
+        tk.Button(row, text="Attach Image...", font=('Helvetica', 10), bg='#6b7280', fg=COLOR_TEXT_LIGHT,
+                  relief=BUTTON_RELIEF, bd=2, command=lambda: self.attach_media(strip)).pack(side='left')
+        tk.Button(row, text="Remove Images", font=('Helvetica', 10), bg='#6b7280', fg=COLOR_TEXT_LIGHT,
+                  relief=BUTTON_RELIEF, bd=2, command=lambda: strip.show(())).pack(side='left', padx=8)
+        strip.pack(side='left', padx=8)
+        return strip
+
+    def attach_media(self, strip):
+        """Asks for an image file, stores it in the media folder and adds it to the strip."""
+        path = filedialog.askopenfilename(
+            title="Choose an image",
+            filetypes=[("Images", "*.png *.gif *.ppm *.pgm"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            name = self.controller.media.add(path)
+        except IOError as e:
+            messagebox.showerror("Attach Error", f"Failed to attach image: {e}")
+            return
+        strip.show(strip.shown + (name,))
+
+
+# This one is used by EditPage and DeletePage, which both list the deck sorted by question.
+class CardListMixin(object):
+    """
+    Mixin that keeps `self.listbox` and `self.displayed_cards` sorted by question.
+    It remembers the question each row was listed under, so after an edit (or a
+    find and replace) only the rows whose question changed are moved, instead
+    of re-sorting and re-filling the whole list.
+    """
+    label_width = 60
+    # Past this many changed rows, re-sorting the whole list is quicker than moving rows one by one
+    max_moved_rows = 200
+
+    def card_label(self, card):
+        q = card.question
+        return q[:self.label_width] + ("..." if len(q) > self.label_width else "")
+
+    def fill_card_list(self):
+        """Brings the listbox up to date with the deck."""
+        cards = self.controller.flashcards
+        listed = getattr(self, 'listed_questions', None)
+        self.listbox.selection_clear(0, tk.END)
+        if listed is not None and len(cards) == len(listed) and set(map(id, cards)) == self.listed_ids:
+            # Same cards as last time: find the ones whose question was edited
+            moved = [i for i, (card, q) in enumerate(zip(self.displayed_cards, listed)) if card.question != q]
+            if len(moved) <= self.max_moved_rows:
+                self._move_rows(moved)
+                return
+
+        # Sort cards by question to give the user a consistent order
+        self.displayed_cards = sorted(cards, key=lambda card: card.question)
+        self.listed_questions = [card.question for card in self.displayed_cards]
+        self.listed_ids = set(map(id, self.displayed_cards))
+        self.listbox.delete(0, tk.END)
+        # One insert call for all rows is much quicker than one call per row
+        self.listbox.insert(tk.END, *map(self.card_label, self.displayed_cards))
+
+    def _move_rows(self, rows):
+        """Takes out the given rows and puts each card back at its new sorted position."""
+        moving = []
+        # Back to front, so the earlier row numbers stay correct
+        for i in reversed(rows):
+            moving.append(self.displayed_cards.pop(i))
+            del self.listed_questions[i]
+            self.listbox.delete(i)
+        for card in moving:
+            i = bisect.bisect_right(self.listed_questions, card.question)
+            self.displayed_cards.insert(i, card)
+            self.listed_questions.insert(i, card.question)
+            self.listbox.insert(i, self.card_label(card))
+
 # --- Page Classes ---
 
 class MainMenu(BasePage):
@@ -344,12 +2368,24 @@ class MainMenu(BasePage):
         self.count_label = tk.Label(self, text="", 
                 font=('Helvetica', 16), fg=COLOR_TEXT_LIGHT, bg=COLOR_SECONDARY) 
         self.count_label.pack(pady=20) 
+
+        # --- Undo / Redo row ---
+        undo_frame = tk.Frame(self, bg=COLOR_SECONDARY)
+        undo_frame.pack(pady=(0, 10))
+        self.undo_btn = tk.Button(undo_frame, text="↶ Undo (Ctrl+Z)", font=('Helvetica', 11), bg='#6b7280',
+                                  fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=2, command=controller.undo)
+        self.undo_btn.pack(side='left', padx=5)
+        self.redo_btn = tk.Button(undo_frame, text="↷ Redo (Ctrl+Y)", font=('Helvetica', 11), bg='#6b7280',
+                                  fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=2, command=controller.redo)
+        self.redo_btn.pack(side='left', padx=5)
         
         buttons = [
             ("Add Flashcard", lambda: controller.show_frame("AddPage"), COLOR_SUCCESS_GREEN),  
             ("Edit Flashcards", lambda: controller.show_frame_if_cards("EditPage"), '#f59e0b'), 
             ("Delete Flashcards", lambda: controller.show_frame_if_cards("DeletePage"), '#ef4444'), 
-            ("Practice Mode", lambda: controller.show_frame_if_cards("PracticePage"), COLOR_ACCENT) 
+            ("Practice Mode", lambda: controller.show_frame_if_cards("PracticePage"), COLOR_ACCENT),
+            ("Find Duplicates", lambda: controller.show_frame_if_cards("DuplicatesPage"), '#8b5cf6'),
+            ("Find and Replace", lambda: controller.show_frame_if_cards("ReplacePage"), '#0891b2')
         ]
         
         for text, cmd, color in buttons:
@@ -362,6 +2398,10 @@ class MainMenu(BasePage):
         # This is called by show_frame() to update the card count
         count = len(self.controller.flashcards)
         self.count_label.config(text=f"Total Cards: {count}")
+        # The history doesn't exist yet while the window is first being built
+        history = getattr(self.controller, 'history', None)
+        self.undo_btn.config(state="normal" if history and history.can_undo() else "disabled")
+        self.redo_btn.config(state="normal" if history and history.can_redo() else "disabled")
 
 # AddPage inherits from BasePage and our FormMixin
 class AddPage(BasePage, FormMixin):
@@ -429,6 +2469,8 @@ class AddPage(BasePage, FormMixin):
     def refresh(self):
         self.q_text.delete("1.0", tk.END)
         self.a_text.delete("1.0", tk.END)
+        self.q_media.show(())
+        self.a_media.show(())
         self.is_horizontal = None # Reset layout state
         self.after(50, self.trigger_resize) # Re-run resize check when page is shown
         
@@ -439,9 +2481,10 @@ class AddPage(BasePage, FormMixin):
             a = self.a_text.get("1.0", tk.END).strip()
             if q and a:
                 # Create a new Flashcard object
-                new_card = Flashcard(question=q, answer=a)
-                # Append it to the controller's main list
-                self.controller.flashcards.append(new_card)
+                new_card = Flashcard(question=q, answer=a,
+                                     question_media=self.q_media.shown, answer_media=self.a_media.shown)
+                # Append it to the controller's main list (through the undo history)
+                self.controller.history.do(AddCardCommand(new_card))
                 
                 self.controller.save_flashcards()
                 self.controller.refresh_main_menu_count() 
@@ -452,7 +2495,7 @@ class AddPage(BasePage, FormMixin):
         except Exception as e:
             messagebox.showerror("Add Error", f"Failed to add card: {e}")
 
-class EditPage(BasePage, FormMixin):
+class EditPage(BasePage, FormMixin, CardListMixin):
     def __init__(self, parent, controller):
         super().__init__(parent, controller)
         self.selected_card = None # Stores the actual Flashcard object being edited
@@ -519,21 +2562,15 @@ class EditPage(BasePage, FormMixin):
         
     def refresh(self):
         """Populates listbox and the self.displayed_cards mapping list."""
-        self.listbox.delete(0, tk.END)
         self.q_text.delete("1.0", tk.END)
         self.a_text.delete("1.0", tk.END)
+        self.q_media.show(())
+        self.a_media.show(())
         self.selected_card = None
-        self.displayed_cards = [] # Clear the mapping
-        
-        # Sort cards by question to give the user a consistent order
-        sorted_cards = sorted(self.controller.flashcards, key=lambda card: card.question)
         
-        for card in sorted_cards:
-            # Add card to our internal list
-            self.displayed_cards.append(card)
-            # Add *only* the question text to the *visible* listbox
-            q = card.question
-            self.listbox.insert(tk.END, q[:60] + ("..." if len(q) > 60 else ""))
+        # Keeps the listbox sorted by question. Only *questions* are shown,
+        # and self.displayed_cards holds the matching Flashcard objects.
+        self.fill_card_list()
 
         self.is_horizontal = None
         self.after(50, self.trigger_resize)
@@ -556,6 +2593,9 @@ class EditPage(BasePage, FormMixin):
             self.a_text.config(state=tk.NORMAL)
             self.a_text.delete("1.0", tk.END)
             self.a_text.insert("1.0", self.selected_card.answer)
+
+            self.q_media.show(self.selected_card.question_media)
+            self.a_media.show(self.selected_card.answer_media)
         except IndexError:
             pass # Ignore clicks on an empty list
         except Exception as e:
@@ -572,11 +2612,12 @@ class EditPage(BasePage, FormMixin):
                     return
                     
                 # --- This is the new, simple logic ---
-                # We just update the object's attributes.
+                # We just update the object's attributes (through the undo history).
                 # Since the controller's list holds this *exact* object,
                 # the changes are saved automatically when we call save_flashcards().
-                self.selected_card.question = new_q
-                self.selected_card.answer = new_a
+                self.controller.history.do(EditCardCommand(
+                    self.selected_card, question=new_q, answer=new_a,
+                    question_media=self.q_media.shown, answer_media=self.a_media.shown))
                 
                 self.controller.save_flashcards() 
                 messagebox.showinfo("Success", "Updated!")
@@ -586,7 +2627,9 @@ class EditPage(BasePage, FormMixin):
         except Exception as e:
             messagebox.showerror("Save Error", f"Failed to save card: {e}")
 
-class DeletePage(BasePage):
+class DeletePage(BasePage, CardListMixin):
+    label_width = 70
+
     def __init__(self, parent, controller):
         super().__init__(parent, controller)
         
@@ -622,15 +2665,7 @@ class DeletePage(BasePage):
 
     def refresh(self):
         """Populates listbox and the self.displayed_cards mapping list."""
-        self.listbox.delete(0, tk.END)
-        self.displayed_cards = [] # Clear the mapping
-        
-        sorted_cards = sorted(self.controller.flashcards, key=lambda card: card.question)
-        
-        for card in sorted_cards:
-            self.displayed_cards.append(card)
-            q = card.question
-            self.listbox.insert(tk.END, q[:70] + ("..." if len(q) > 70 else ""))
+        self.fill_card_list()
 
     def delete(self):
         """Finds the Flashcard object by index and removes it."""
@@ -644,7 +2679,7 @@ class DeletePage(BasePage):
             if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete this card?\n{q_preview}...?"):
                 # We can remove the object directly from the controller's list
                 # because `card_to_delete` is a reference to that *exact* object.
-                self.controller.flashcards.remove(card_to_delete)
+                self.controller.history.do(DeleteCardsCommand([card_to_delete]))
                 self.controller.save_flashcards()
                 self.controller.refresh_main_menu_count()
                 messagebox.showinfo("Success", "Card Deleted!")
@@ -663,11 +2698,11 @@ class DeletePage(BasePage):
 
         confirm_msg = (
             f"⚠️ WARNING! You are about to delete ALL {card_count} flashcards. "
-            "This action cannot be undone. Are you absolutely sure?"
+            "You can still get them back with Undo (Ctrl+Z). Are you sure?"
         )
         
         if messagebox.askyesno("CONFIRM DELETE ALL", confirm_msg):
-            self.controller.flashcards.clear() # .clear() is a standard list method
+            self.controller.history.do(ClearCardsCommand())
             self.controller.save_flashcards()
             self.controller.refresh_main_menu_count()
             messagebox.showinfo("Success", f"Successfully deleted all {card_count} flashcards.")
@@ -676,20 +2711,24 @@ class DeletePage(BasePage):
             messagebox.showinfo("Canceled", "Deletion of all flashcards canceled.")
             
 class PracticePage(BasePage):
-    # --- STATE CONSTANTS ---
-    # Using constants makes the state machine logic easier to read
-    QUESTION_STATE = 0
-    ANSWER_STATE = 1
+    # The states come from PracticeSession, which runs the actual state machine
+    QUESTION_STATE = PracticeSession.QUESTION_STATE
+    ANSWER_STATE = PracticeSession.ANSWER_STATE
+
+    # Largest size (width, height) card images are shown at
+    MEDIA_SIZE = (240, 120)
     
     def __init__(self, parent, controller):
         super().__init__(parent, controller)
         
-        # This page "has a" StatTracker. (Composition)
-        self.stats = StatTracker()
-        self.current_state = self.QUESTION_STATE
-        
-        self.cards = [] # This will be a list of Flashcard objects
-        self.index = 0
+        # This page "has a" PracticeSession, which keeps the cards, the
+        # current state and the StatTracker. (Composition)
+        self.session = PracticeSession()
+        self.stats = self.session.stats
+        # ...and an AnswerGrader for typed answer mode (Composition again)
+        self.grader = AnswerGrader()
+        # Last options sent to each button (see _configure)
+        self._widget_options = {}
         
         tk.Label(self, text="Practice Mode", font=('Helvetica', 20, 'bold'),
                 fg=COLOR_TEXT_LIGHT, bg=COLOR_SECONDARY).pack(pady=30)
@@ -699,6 +2738,18 @@ class PracticePage(BasePage):
         
         self.progress = tk.Label(stat_frame, text="", font=('Helvetica', 12), bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK)
         self.progress.pack(side='left', padx=25, pady=12) 
+
+        # When ticked, the user types the answer and the app marks it
+        self.typed_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(stat_frame, text="Type my answer", variable=self.typed_mode,
+                       font=('Helvetica', 12), bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK,
+                       activebackground=COLOR_CARD_BG, command=self.toggle_typed_mode).pack(side='left', padx=25)
+
+        # When ticked, Space shows the answer and J / K mark it Correct / Wrong
+        self.rapid_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(stat_frame, text="Rapid review (Space, J, K)", variable=self.rapid_mode,
+                       font=('Helvetica', 12), bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK,
+                       activebackground=COLOR_CARD_BG, command=self.toggle_rapid_mode).pack(side='left')
         
         self.score_lbl = tk.Label(stat_frame, text="Score: 0", font=('Helvetica', 12, 'bold'),
                                   fg=COLOR_SUCCESS_GREEN, bg=COLOR_CARD_BG)
@@ -728,12 +2779,16 @@ class PracticePage(BasePage):
         q_scrollbar = tk.Scrollbar(q_frame)
         q_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.question = tk.Text(q_frame, height=5, font=('Helvetica', 14, 'bold'), 
-                                state=tk.DISABLED, wrap=tk.WORD, bg='#f7f7f7', fg=COLOR_TEXT_DARK,
-                                yscrollcommand=q_scrollbar.set, borderwidth=1, relief="flat", highlightthickness=0,
-                                padx=10, pady=10)
+        # BufferedText lets the next card's question be prepared while this one is shown
+        self.question = BufferedText(q_frame, q_scrollbar, height=5, font=('Helvetica', 14, 'bold'), 
+                                     wrap=tk.WORD, bg='#f7f7f7', fg=COLOR_TEXT_DARK,
+                                     borderwidth=1, relief="flat", highlightthickness=0,
+                                     padx=10, pady=10)
         self.question.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        q_scrollbar.config(command=self.question.yview)
+
+        # Images attached to the question (decoded lazily through the media cache)
+        self.q_media = MediaStrip(main_content, controller.media_cache, *self.MEDIA_SIZE)
+        self.q_media.pack(anchor='w', padx=20, pady=(5, 0))
 
         # --- SCROLLABLE ANSWER TEXT ---
         tk.Label(main_content, text="Answer:", font=('Helvetica', 14, 'bold'), bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK).pack(anchor='w', padx=20, pady=(20, 5))
@@ -744,12 +2799,26 @@ class PracticePage(BasePage):
         a_scrollbar = tk.Scrollbar(a_frame)
         a_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.answer = tk.Text(a_frame, height=5, font=('Helvetica', 13), 
-                              fg=COLOR_ACCENT, state=tk.DISABLED, wrap=tk.WORD, bg='#f7f7f7',
-                              yscrollcommand=a_scrollbar.set, borderwidth=1, relief="flat", highlightthickness=0,
-                              padx=10, pady=10)
+        self.answer = BufferedText(a_frame, a_scrollbar, height=5, font=('Helvetica', 13), 
+                                   fg=COLOR_ACCENT, wrap=tk.WORD, bg='#f7f7f7',
+                                   borderwidth=1, relief="flat", highlightthickness=0,
+                                   padx=10, pady=10)
         self.answer.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        a_scrollbar.config(command=self.answer.yview)
+
+        self.a_media = MediaStrip(main_content, controller.media_cache, *self.MEDIA_SIZE)
+        self.a_media.pack(anchor='w', padx=20, pady=(0, 10))
+
+        # --- TYPED ANSWER BOX (only shown in typed answer mode) ---
+        self.typed_frame = tk.Frame(main_content, bg=COLOR_CARD_BG)
+        tk.Label(self.typed_frame, text="Your answer:", font=('Helvetica', 12, 'bold'),
+                 bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK).pack(side='left')
+        self.typed_entry = tk.Entry(self.typed_frame, font=('Helvetica', 13), bg='#f7f7f7', fg=COLOR_TEXT_DARK)
+        self.typed_entry.pack(side='left', fill='x', expand=True, padx=10)
+        # Pressing Enter is the same as clicking "Check Answer"
+        self.typed_entry.bind("<Return>", lambda event: self.show_answer())
+        self.result_lbl = tk.Label(self.typed_frame, text="", font=('Helvetica', 12, 'bold'),
+                                   bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK)
+        self.result_lbl.pack(side='right')
         
         # --- Controls ---
         
@@ -778,6 +2847,14 @@ class PracticePage(BasePage):
                  bg=COLOR_PRIMARY_DARK, fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=BUTTON_BORDER_WIDTH, pady=14,
                  command=lambda: controller.show_frame("MainMenu")).pack(fill='x')
         
+        # --- Rapid review keys ---
+        # These are bound to the page itself, which holds the keyboard focus in rapid mode
+        self.bind("<space>", self.on_reveal_key)
+        for key in ("j", "J"):
+            self.bind(f"<KeyPress-{key}>", lambda event: self.on_grade_key(True))
+        for key in ("k", "K"):
+            self.bind(f"<KeyPress-{key}>", lambda event: self.on_grade_key(False))
+        
         # This page also uses the responsive resize logic
         self.threshold = 400
         self.is_horizontal = None
@@ -805,48 +2882,41 @@ class PracticePage(BasePage):
             self.wrong_btn.pack(side='right', fill='x', expand=True, padx=(8, 0))
             self.is_horizontal = True
 
-    def _set_text(self, text_widget, content):
-        """Helper to safely insert text into a read-only Text widget."""
-        # We have to set state to NORMAL to change the text...
-        text_widget.config(state=tk.NORMAL)
-        text_widget.delete("1.0", tk.END)
-        text_widget.insert("1.0", content)
-        # ...and then set it back to DISABLED so the user can't type in it.
-        text_widget.config(state=tk.DISABLED)
-        # Scroll to top
-        text_widget.yview_moveto(0)
+    def _configure(self, widget, **options):
+        """
+        Like widget.config(), but only sends the options that actually changed.
+        Every change makes Tk redraw the widget, so skipping no-op changes
+        keeps moving between cards quick.
+        """
+        last = self._widget_options.setdefault(str(widget), {})
+        changed = {name: value for name, value in options.items() if last.get(name) != value}
+        if changed:
+            widget.config(**changed)
+            last.update(changed)
 
     def _set_controls(self, state):
         """
         This is a simple "State Machine".
         It manages the UI based on whether we are in QUESTION_STATE or ANSWER_STATE.
         """
-        self.current_state = state
-        
         if state == self.QUESTION_STATE:
             # User is looking at a question
-            self.show_btn.config(state="normal", text="Show Answer")
-            self.skip_btn.config(state="normal", text="Skip Card")
-            self.correct_btn.config(state="disabled")
-            self.wrong_btn.config(state="disabled")
+            self._configure(self.show_btn, state="normal", text="Check Answer" if self.typed_mode.get() else "Show Answer")
+            self._configure(self.skip_btn, state="normal", text="Skip Card")
+            self._configure(self.correct_btn, state="disabled")
+            self._configure(self.wrong_btn, state="disabled")
         
         elif state == self.ANSWER_STATE:
             # User is looking at the answer
-            self.show_btn.config(state="disabled", text="Answer Shown")
-            self.skip_btn.config(state="disabled") # Can't skip after seeing answer
-            self.correct_btn.config(state="normal")
-            self.wrong_btn.config(state="normal")
+            self._configure(self.show_btn, state="disabled", text="Answer Shown")
+            self._configure(self.skip_btn, state="disabled") # Can't skip after seeing answer
+            self._configure(self.correct_btn, state="normal")
+            self._configure(self.wrong_btn, state="normal")
         
     def refresh(self):
         """Creates a shuffled copy of the list of Flashcard objects."""
-        # Start a new session
-        # `list()` creates a new *shallow copy* of the controller's list.
-        # This is important so `random.shuffle` doesn't mess up the original list.
-        self.cards = list(self.controller.flashcards) 
-        random.shuffle(self.cards)
-        self.index = 0
-        
-        self.stats.reset(len(self.cards)) # Reset the stat tracker
+        # Start a new session (the scheduler shuffles a copy of the deck)
+        self.session.start(self.controller.flashcards)
         self.score_lbl.config(text=self.stats.get_display())
         
         self.show_card()
@@ -855,35 +2925,124 @@ class PracticePage(BasePage):
         
     def show_card(self):
         """Pulls question from the Flashcard object."""
-        if self.index < len(self.cards):
-            # Get the Flashcard object for the current index
-            card = self.cards[self.index]
+        card = self.session.current_card() # Get the Flashcard object for the current index
+        if card is not None:
             
-            self._set_text(self.question, card.question) # Get question from object
-            self._set_text(self.answer, "") # Clear previous answer
-            self.progress.config(text=f"Card {self.index + 1} of {len(self.cards)}")
+            self.question.show(card.question) # Get question from object
+            # The answer is loaded now but stays hidden until show_answer()
+            self.answer.show(card.answer, hidden=True)
+            self.q_media.show(card.question_media)
+            self.a_media.show(())
+            # Get the next card ready while the user is thinking,
+            # so moving on later is instant
+            self.after_idle(self.prepare_next_card)
+            self.progress.config(text=f"Card {self.session.index + 1} of {len(self.session.cards)}")
             self._set_controls(self.QUESTION_STATE) # Set buttons for question state
+            if self.typed_mode.get():
+                self.typed_entry.delete(0, tk.END)
+                self.result_lbl.config(text="")
+                self.typed_entry.focus_set()
+            elif self.rapid_mode.get():
+                self.focus_set() # The page needs the focus to receive Space / J / K
         else:
             self.finish() # No more cards!
 
+    def prepare_next_card(self):
+        """Loads the next card's text into the hidden buffers and decodes its images."""
+        cache = self.controller.media_cache
+        card = self.session.current_card()
+        if card is not None:
+            cache.prefetch(card.answer_media, *self.MEDIA_SIZE)
+        upcoming = self.session.upcoming_card()
+        if upcoming is not None:
+            self.question.prepare(upcoming.question)
+            self.answer.prepare(upcoming.answer, hidden=True)
+            cache.prefetch(upcoming.question_media + upcoming.answer_media, *self.MEDIA_SIZE)
+
+    def toggle_typed_mode(self):
+        """Shows or hides the typed answer box when the checkbox is clicked."""
+        if self.typed_mode.get():
+            self.rapid_mode.set(False) # Typing "j" or "k" mustn't mark the card
+            self.typed_frame.pack(fill='x', padx=20, pady=(0, 20))
+        else:
+            self.typed_frame.pack_forget()
+        if self.session.is_finished():
+            return
+        if self.session.state == self.QUESTION_STATE:
+            # Show the current card again so the buttons match the new mode
+            self.show_card()
+        else:
+            # The answer has already been seen (and maybe scored), so asking
+            # the same card again could score it twice: move on instead
+            self.next_card()
+
+    def toggle_rapid_mode(self):
+        """Turns the Space / J / K keyboard shortcuts on or off."""
+        if self.rapid_mode.get():
+            if self.typed_mode.get():
+                self.typed_mode.set(False)
+                self.toggle_typed_mode()
+            self.focus_set()
+
+    def on_reveal_key(self, event):
+        """Space: show the answer (rapid review mode only)."""
+        if self.rapid_mode.get() and self.session.state == self.QUESTION_STATE:
+            self.show_answer()
+        return "break"
+
+    def on_grade_key(self, was_correct):
+        """J / K: mark the revealed card Correct / Wrong (rapid review mode only)."""
+        if self.rapid_mode.get() and self.session.state == self.ANSWER_STATE:
+            if was_correct:
+                self.correct()
+            else:
+                self.wrong()
+        return "break"
+
     def show_answer(self):
         """Pulls answer from the Flashcard object."""
-        if self.current_state == self.QUESTION_STATE:
-            card = self.cards[self.index]
-            self._set_text(self.answer, card.answer) # Get answer from object
+        card = self.session.current_card()
+        if self.session.show_answer():
+            self.answer.reveal() # The answer is already loaded, just make it visible
+            self.a_media.show(card.answer_media)
             self._set_controls(self.ANSWER_STATE) # Set buttons for answer state
+            if self.typed_mode.get():
+                self.grade_typed_answer(card)
+        elif self.typed_mode.get():
+            # In typed mode the app has already marked the card,
+            # so this button (or Enter) just moves on.
+            self.next_card()
+
+    def grade_typed_answer(self, card):
+        """Marks the typed answer automatically instead of asking Correct/Wrong."""
+        typed = self.typed_entry.get().strip()
+        score, passed = self.grader.grade(typed, card.answer)
+        if passed:
+            self.stats.increment_score()
+            self.score_lbl.config(text=self.stats.get_display())
+        self.result_lbl.config(text=f"{'Correct' if passed else 'Wrong'} ({round(score * 100)}% match)",
+                               fg=COLOR_SUCCESS_GREEN if passed else '#ef4444')
+
+        # The app did the marking, so the Correct/Wrong buttons aren't needed
+        self._configure(self.correct_btn, state="disabled")
+        self._configure(self.wrong_btn, state="disabled")
+        self._configure(self.show_btn, state="normal", text="Next Card")
+
+        try:
+            append_typed_answer(self.controller.typed_log_file, card, typed, score, passed)
+        except IOError as e:
+            messagebox.showerror("Save Error", f"Could not save your typed answer: {e}")
 
     def next_card(self):
         """Moves to the next card index and shows it."""
-        self.index += 1
+        self.session.next_card()
         self.show_card()
 
     def correct(self):
         """Handles a correct answer and moves to the next card."""
-        if self.current_state == self.ANSWER_STATE:
-            self.stats.increment_score()
+        if self.session.mark(True):
             self.score_lbl.config(text=self.stats.get_display())
-            self.next_card()
+            self.show_card()
 
     def wrong(self):
         """Handles a wrong or skipped answer and moves to the next card."""
@@ -900,10 +3059,393 @@ class PracticePage(BasePage):
                           f"You finished your session!\nScore: {score}/{total} ({pct}%)")
         self.controller.show_frame("MainMenu")
 
+class DuplicatesPage(BasePage):
+    """Lets the user review groups of near-duplicate cards and delete the extras."""
+    def __init__(self, parent, controller):
+        super().__init__(parent, controller)
+        # remember=True: after an edit, only the edited cards are hashed again
+        self.finder = NearDuplicateFinder(remember=True)
+
+        # Same listbox-to-object mapping as EditPage, but group header
+        # rows map to None because they aren't real cards.
+        self.displayed_cards = []
+
+        tk.Label(self, text="Near-Duplicate Cards", font=('Helvetica', 20, 'bold'),
+                fg=COLOR_TEXT_LIGHT, bg=COLOR_SECONDARY).pack(pady=30)
+
+        self.summary = tk.Label(self, text="", font=('Helvetica', 12),
+                fg=COLOR_TEXT_LIGHT, bg=COLOR_SECONDARY)
+        self.summary.pack()
+
+        frame = tk.Frame(self, bg=COLOR_CARD_BG)
+        frame.pack(fill='both', expand=True, padx=100, pady=30)
+
+        self.listbox = tk.Listbox(frame, font=('Helvetica', 12), borderwidth=1, relief="solid", bg="#f7f7f7", fg=COLOR_TEXT_DARK)
+        self.listbox.pack(fill='both', expand=True, padx=30, pady=(30, 15))
+
+        btn_frame = tk.Frame(frame, bg=COLOR_CARD_BG)
+        btn_frame.pack(fill='x', padx=30, pady=(15, 30))
+
+        tk.Button(btn_frame, text="Delete Selected", font=('Helvetica', 13, 'bold'),
+                 bg='#ef4444', fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=BUTTON_BORDER_WIDTH, pady=14,
+                 command=self.delete).pack(side='left', fill='x', expand=True, padx=(0, 8))
+
+        tk.Button(btn_frame, text="Back", font=('Helvetica', 13, 'bold'),
+                 bg='#6b7280', fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=BUTTON_BORDER_WIDTH, pady=14,
+                 command=lambda: controller.show_frame("MainMenu")).pack(side='right', fill='x', expand=True, padx=(8, 0))
+
+    def refresh(self):
+        """Re-runs the duplicate search and fills the listbox with one block per group."""
+        self.listbox.delete(0, tk.END)
+        self.displayed_cards = []
+
+        cards = self.controller.flashcards
+        groups = self.finder.find_groups(cards)
+        self.summary.config(text=f"{len(groups)} group(s) of similar cards found")
+
+        for number, group in enumerate(groups, start=1):
+            self.displayed_cards.append(None)
+            self.listbox.insert(tk.END, f"Group {number} ({len(group)} cards)")
+            for index in group:
+                card = cards[index]
+                self.displayed_cards.append(card)
+                q = card.question
+                self.listbox.insert(tk.END, "    " + q[:70] + ("..." if len(q) > 70 else ""))
+
+    def delete(self):
+        """Deletes the selected card so only the copies the user wants are kept."""
+        try:
+            sel_index = self.listbox.curselection()[0]
+            card_to_delete = self.displayed_cards[sel_index]
+            if card_to_delete is None:
+                messagebox.showwarning("No Selection", "Please select a card, not a group heading.")
+                return
+
+            q_preview = card_to_delete.question[:50]
+            if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete this card?\n{q_preview}...?"):
+                self.controller.history.do(DeleteCardsCommand([card_to_delete]))
+                self.controller.save_flashcards()
+                self.controller.refresh_main_menu_count()
+                self.refresh()
+        except IndexError:
+            messagebox.showwarning("No Selection", "Please select a card to delete.")
+        except Exception as e:
+            messagebox.showerror("Delete Error", f"Failed to delete card: {e}")
+
+
+class ReplacePage(BasePage):
+    """Find and replace text across the whole deck, with a preview before anything changes."""
+    # Showing a million rows would freeze the window, so the preview stops here
+    PREVIEW_LIMIT = 500
+
+    def __init__(self, parent, controller):
+        super().__init__(parent, controller)
+
+        tk.Label(self, text="Find and Replace", font=('Helvetica', 20, 'bold'),
+                fg=COLOR_TEXT_LIGHT, bg=COLOR_SECONDARY).pack(pady=30)
+
+        frame = tk.Frame(self, bg=COLOR_CARD_BG)
+        frame.pack(fill='both', expand=True, padx=100, pady=(0, 30))
+
+        # --- Find / Replace boxes ---
+        form = tk.Frame(frame, bg=COLOR_CARD_BG)
+        form.pack(fill='x', padx=30, pady=(30, 10))
+        form.grid_columnconfigure(1, weight=1)
+        tk.Label(form, text="Find:", font=('Helvetica', 12, 'bold'),
+                bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK).grid(row=0, column=0, sticky='w', pady=5)
+        self.find_entry = tk.Entry(form, font=('Helvetica', 12), bg='#f7f7f7', fg=COLOR_TEXT_DARK)
+        self.find_entry.grid(row=0, column=1, sticky='ew', padx=(10, 0), pady=5)
+        tk.Label(form, text="Replace with:", font=('Helvetica', 12, 'bold'),
+                bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK).grid(row=1, column=0, sticky='w', pady=5)
+        self.replace_entry = tk.Entry(form, font=('Helvetica', 12), bg='#f7f7f7', fg=COLOR_TEXT_DARK)
+        self.replace_entry.grid(row=1, column=1, sticky='ew', padx=(10, 0), pady=5)
+
+        # --- Options ---
+        options = tk.Frame(frame, bg=COLOR_CARD_BG)
+        options.pack(fill='x', padx=30)
+        self.in_question = tk.BooleanVar(value=True)
+        self.in_answer = tk.BooleanVar(value=True)
+        self.use_regex = tk.BooleanVar(value=False)
+        self.ignore_case = tk.BooleanVar(value=False)
+        for text, variable in (("Questions", self.in_question), ("Answers", self.in_answer),
+                               ("Regular expression", self.use_regex), ("Ignore case", self.ignore_case)):
+            tk.Checkbutton(options, text=text, variable=variable, font=('Helvetica', 11),
+                           bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK, activebackground=COLOR_CARD_BG,
+                           command=self.clear_preview).pack(side='left', padx=(0, 15))
+
+        self.summary = tk.Label(frame, text="", font=('Helvetica', 12),
+                bg=COLOR_CARD_BG, fg=COLOR_TEXT_DARK)
+        self.summary.pack(anchor='w', padx=30, pady=(10, 0))
+
+        # --- Preview of the affected cards ---
+        self.listbox = tk.Listbox(frame, font=('Helvetica', 11), borderwidth=1, relief="solid", bg="#f7f7f7", fg=COLOR_TEXT_DARK)
+        self.listbox.pack(fill='both', expand=True, padx=30, pady=(10, 15))
+
+        btn_frame = tk.Frame(frame, bg=COLOR_CARD_BG)
+        btn_frame.pack(fill='x', padx=30, pady=(15, 30))
+
+        tk.Button(btn_frame, text="Preview", font=('Helvetica', 13, 'bold'),
+                 bg=COLOR_ACCENT, fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=BUTTON_BORDER_WIDTH, pady=14,
+                 command=self.preview).pack(side='left', fill='x', expand=True, padx=(0, 8))
+
+        tk.Button(btn_frame, text="Replace All", font=('Helvetica', 13, 'bold'),
+                 bg='#0891b2', fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=BUTTON_BORDER_WIDTH, pady=14,
+                 command=self.replace_all).pack(side='left', fill='x', expand=True, padx=8)
+
+        tk.Button(btn_frame, text="Back", font=('Helvetica', 13, 'bold'),
+                 bg='#6b7280', fg=COLOR_TEXT_LIGHT, relief=BUTTON_RELIEF, bd=BUTTON_BORDER_WIDTH, pady=14,
+                 command=lambda: controller.show_frame("MainMenu")).pack(side='right', fill='x', expand=True, padx=(8, 0))
+
+        # Enter in either box shows the preview
+        self.find_entry.bind("<Return>", lambda event: self.preview())
+        self.replace_entry.bind("<Return>", lambda event: self.preview())
+
+    def refresh(self):
+        """The deck may have changed since the last visit, so the old preview is cleared."""
+        self.clear_preview()
+        self.find_entry.focus_set()
+
+    def clear_preview(self):
+        self.listbox.delete(0, tk.END)
+        self.summary.config(text="")
+
+    def build(self):
+        """Returns a FindReplace for the current settings, or None (after a warning) if they are invalid."""
+        fields = [name for name, variable in (('question', self.in_question), ('answer', self.in_answer))
+                  if variable.get()]
+        try:
+            return FindReplace(self.find_entry.get(), self.replace_entry.get(), regex=self.use_regex.get(),
+                               ignore_case=self.ignore_case.get(), fields=fields)
+        except ValueError as e:
+            messagebox.showwarning("Error", str(e))
+        except re.error as e:
+            messagebox.showwarning("Error", f"The regular expression or replacement is not valid: {e}")
+        return None
+
+    def find_changes(self):
+        """Returns the list of changes for the current settings, or None if they can't be used."""
+        finder = self.build()
+        if finder is None:
+            return None
+        return finder.changes(self.controller.flashcards)
+
+    def preview(self):
+        """Lists every card that would change, before and after."""
+        self.clear_preview()
+        changes = self.find_changes()
+        if changes is None:
+            return
+
+        def short(text, width=45):
+            text = " ".join(text.split())
+            return text[:width] + ("..." if len(text) > width else "")
+
+        rows = []
+        for card, new_values in changes[:self.PREVIEW_LIMIT]:
+            for name, value in new_values.items():
+                rows.append(f"{name.capitalize()}: {short(getattr(card, name))}  →  {short(value)}")
+        if len(changes) > self.PREVIEW_LIMIT:
+            rows.append(f"... and {len(changes) - self.PREVIEW_LIMIT} more cards")
+        self.listbox.insert(tk.END, *rows)
+        self.summary.config(text=f"{len(changes)} of {len(self.controller.flashcards)} cards will change")
+
+    def replace_all(self):
+        """Applies the replacement to every matching card as one undoable step with a single save."""
+        changes = self.find_changes()
+        if changes is None:
+            return
+        if not changes:
+            messagebox.showinfo("No Matches", "No cards contain that text.")
+            return
+        emptied = FindReplace.emptied(changes)
+        if emptied:
+            messagebox.showwarning("Error", f"This would leave {emptied} card(s) with an empty question or answer.")
+            return
+        if not messagebox.askyesno("Confirm Replace", f"Change {len(changes)} card(s)? You can undo this with Ctrl+Z."):
+            return
+        try:
+            self.controller.history.do(BatchEditCommand(changes))
+            # One save for the whole batch, however many cards changed
+            self.controller.save_flashcards()
+            self.controller.refresh_main_menu_count()
+            messagebox.showinfo("Success", f"Updated {len(changes)} card(s)!")
+            self.controller.show_frame("MainMenu")
+        except Exception as e:
+            messagebox.showerror("Replace Error", f"Failed to replace text: {e}")
+
+
+# --- Command-Line Tools ---
+# These run *without* opening the window, which is handy for big decks and scripts.
+def print_near_duplicate_report(data_file, threshold):
+    """Prints every group of near-duplicate cards found in `data_file`."""
+    cards, _ = read_deck_file(data_file)
+    finder = NearDuplicateFinder(threshold=threshold)
+    groups = finder.find_groups(cards)
+
+    print(f"Checked {len(cards)} cards in '{data_file}': {len(groups)} group(s) of near-duplicates.")
+    for number, group in enumerate(groups, start=1):
+        print(f"\nGroup {number}:")
+        first = cards[group[0]]
+        for index in group:
+            card = cards[index]
+            score = finder.similarity(first, card)
+            print(f"  [{index}] ({score:.2f}) {card.question!r} -> {card.answer!r}")
+
+
+def print_regrade_report(data_file, pass_mark):
+    """Re-grades the typed answer history for `data_file` and prints a summary."""
+    log_file = deck_stem(data_file) + "_typed_answers.jsonl"
+    if not os.path.exists(log_file):
+        print(f"No typed answers saved yet ('{log_file}' not found).")
+        return
+    start = time.perf_counter()
+    total, passed = regrade_typed_answers(log_file, AnswerGrader(pass_mark=pass_mark))
+    elapsed = time.perf_counter() - start
+    pct = round(passed / total * 100, 1) if total else 0.0
+    print(f"Re-graded {total} typed answers in {elapsed:.2f}s with pass mark {pass_mark}: "
+          f"{passed} passed ({pct}%).")
+
+
+def run_history_command(data_file, args):
+    """Handles the --history-* options."""
+    history = DeckHistory(data_file)
+    if args.history_snapshot:
+        version = history.record(read_deck_file(data_file)[0])
+        print(f"Recorded version {version}." if version else "Nothing changed since the last version.")
+    elif args.history_restore is not None:
+        cards = history.restore(args.history_restore)
+        deck_file = DeckFile(data_file)
+        if os.path.exists(data_file):
+            deck_file.load()
+        # Saving through DeckFile keeps the write safe if the app is open too
+        deck_file.save(cards)
+        print(f"Restored version {args.history_restore} ({len(cards)} cards) into '{data_file}'.")
+    elif args.history_diff is not None:
+        version_a, version_b = args.history_diff
+        added, removed, changed = history.diff(version_a, version_b)
+        print(f"Version {version_a} -> {version_b}: {len(added)} added, "
+              f"{len(removed)} removed, {len(changed)} changed.")
+        for card in added:
+            print(f"  + {card.question!r} -> {card.answer!r}")
+        for card in removed:
+            print(f"  - {card.question!r} -> {card.answer!r}")
+        for old, new in changed:
+            print(f"  ~ {old.question!r} -> {old.answer!r}")
+            print(f"    {new.question!r} -> {new.answer!r}")
+    else:
+        entries = history.versions()
+        if not entries:
+            print("No versions recorded yet.")
+        for entry in entries:
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['time']))
+            print(f"  v{entry['version']:<5} {when}  {entry['cards']:>8} cards  "
+                  f"{entry['kind']:<5}  {entry['size']:>9} bytes")
+
+
+def run_find_replace(data_file, args):
+    """Handles --find: replaces text in every card of `data_file` with a single save."""
+    fields = ('question', 'answer') if args.fields == 'both' else (args.fields,)
+    try:
+        finder = FindReplace(args.find, args.replace_with, regex=args.regex,
+                             ignore_case=args.ignore_case, fields=fields)
+    except (ValueError, re.error) as e:
+        sys.exit(f"Error: {e}")
+
+    deck_file = DeckFile(data_file)
+    cards, _ = deck_file.load()
+    start = time.perf_counter()
+    changes = finder.changes(cards)
+    elapsed = time.perf_counter() - start
+    print(f"Searched {len(cards)} cards in {elapsed:.2f}s: {len(changes)} would change.")
+    for card, new_values in changes[:20]:
+        for name, value in new_values.items():
+            print(f"  {name}: {getattr(card, name)!r} -> {value!r}")
+    if len(changes) > 20:
+        print(f"  ... and {len(changes) - 20} more cards")
+
+    if args.preview or not changes:
+        return
+    emptied = FindReplace.emptied(changes)
+    if emptied:
+        sys.exit(f"Error: this would leave {emptied} card(s) with an empty question or answer.")
+    for card, new_values in changes:
+        for name, value in new_values.items():
+            setattr(card, name, value)
+    # Saving through DeckFile keeps the write safe if the app is open too
+    deck_file.save(cards)
+    print(f"Updated {len(changes)} cards in '{data_file}'.")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Flashcard Master")
+    parser.add_argument("--deck", default="flashcards.json",
+                        help="deck file to use (default: flashcards.json)")
+    parser.add_argument("--near-duplicates", action="store_true",
+                        help="print a report of near-duplicate cards and exit")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="similarity (0-1) needed to count as a near-duplicate (default: 0.5)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the headless deck service instead of the window")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address for --serve to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="port for --serve to listen on (default: 8765)")
+    parser.add_argument("--server",
+                        help="open the window as a client of a deck service, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--regrade", action="store_true",
+                        help="re-grade every saved typed answer and exit")
+    parser.add_argument("--pass-mark", type=float, default=0.8,
+                        help="similarity (0-1) a typed answer needs to pass (default: 0.8)")
+    history = parser.add_argument_group("deck history")
+    history.add_argument("--history", action="store_true",
+                         help="list the recorded versions of the deck and exit")
+    history.add_argument("--history-snapshot", action="store_true",
+                         help="record the current deck as a new version and exit")
+    history.add_argument("--history-restore", type=int, metavar="VERSION",
+                         help="replace the deck with an older version and exit")
+    history.add_argument("--history-diff", type=int, nargs=2, metavar=("A", "B"),
+                         help="show what changed between two versions and exit")
+    replace = parser.add_argument_group("find and replace")
+    replace.add_argument("--find", metavar="TEXT",
+                         help="replace TEXT in every card (shows what changed) and exit")
+    replace.add_argument("--replace-with", default="", metavar="TEXT",
+                         help="text to put in place of --find (default: remove it)")
+    replace.add_argument("--regex", action="store_true",
+                         help="treat --find as a regular expression (--replace-with may use \\1 etc.)")
+    replace.add_argument("--ignore-case", action="store_true",
+                         help="match --find regardless of upper/lower case")
+    replace.add_argument("--fields", choices=("question", "answer", "both"), default="both",
+                         help="which side of the cards to change (default: both)")
+    replace.add_argument("--preview", action="store_true",
+                         help="only show what --find would change, don't save")
+    return parser
+
+
 # --- Run the Application ---
 # This is a standard Python convention.
 # The code inside this `if` block will only run
 # if this file is executed directly (not if it's imported by another file).
 if __name__ == "__main__":
-    app = FlashcardApp()
+    args = build_arg_parser().parse_args()
+    if args.near_duplicates:
+        print_near_duplicate_report(args.deck, args.threshold)
+        sys.exit()
+    if args.regrade:
+        print_regrade_report(args.deck, args.pass_mark)
+        sys.exit()
+    if args.find is not None:
+        run_find_replace(args.deck, args)
+        sys.exit()
+    if args.history or args.history_snapshot or args.history_restore is not None or args.history_diff:
+        run_history_command(args.deck, args)
+        sys.exit()
+    if args.serve:
+        print(f"Serving '{args.deck}' on http://{args.host}:{args.port} (Ctrl+C to stop)")
+        try:
+            asyncio.run(DeckService(args.deck).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        sys.exit()
+
+    app = FlashcardApp(data_file=args.deck, server_url=args.server)
     app.mainloop() # This starts the Tkinter event loop
\ No newline at end of file
@@ -0,0 +1,254 @@
+# ============================================================= #
+# Flashcard Master - deck service tests                         #
+#                                                               #
+# Starts a real DeckService on a free loopback port and talks   #
+# to it over HTTP with DeckClient.                              #
+#                                                               #
+# Run from the project folder:                                  #
+#     python -m unittest discover tests                         #
+# ============================================================= #
+
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Let the tests import main.py from the folder above
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from main import (ClearCardsCommand, CommandLog, DeckClient, DeckService, DeckServiceError,  # noqa: E402
+                  DeleteCardsCommand, Flashcard, read_deck_file, write_deck_file)
+
+
+class ServiceTestCase(unittest.TestCase):
+    """Runs a DeckService in a background event loop for each test."""
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.deck_path = os.path.join(self.folder.name, "deck.json")
+        write_deck_file(self.deck_path, [Flashcard("What is the capital of France?", "Paris"),
+                                         Flashcard("What does HTML stand for?", "HyperText Markup Language"),
+                                         Flashcard("Who painted the Mona Lisa?", "Leonardo da Vinci")])
+        self.service = DeckService(self.deck_path, flush_delay=0.05)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server = self.run_in_loop(self.service.start(port=0))
+        self.url = "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+
+    def tearDown(self):
+        # Wait for any pending save, like DeckService.serve() does when it stops
+        self.run_in_loop(self.service.flush())
+        self.server.close()
+        self.run_in_loop(self.server.wait_closed())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.folder.cleanup()
+
+    def run_in_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=10)
+
+    def client(self):
+        return DeckClient(self.url)
+
+    def request(self, method, path, payload=None):
+        """Sends one raw request and returns (status code, JSON answer)."""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=body, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read().decode('utf-8'))
+
+
+class CardsTest(ServiceTestCase):
+    def test_add_get_update_delete(self):
+        status, card = self.request('POST', '/cards', {'question': "2 + 2?", 'answer': "4"})
+        self.assertEqual(status, 201)
+        card_id = card['id']
+
+        self.assertEqual(self.request('GET', f'/cards/{card_id}'), (200, card))
+        status, updated = self.request('PUT', f'/cards/{card_id}', {'answer': "Four"})
+        self.assertEqual((status, updated['question'], updated['answer']), (200, "2 + 2?", "Four"))
+        self.assertEqual(self.request('DELETE', f'/cards/{card_id}'), (200, {'id': card_id, 'deleted': True}))
+        self.assertEqual(self.request('GET', f'/cards/{card_id}')[0], 404)
+        self.assertEqual(len(self.request('GET', '/cards')[1]), 3)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request('POST', '/cards', {'question': "No answer"})[0], 400)
+        self.assertEqual(self.request('GET', '/cards/abc')[0], 400)
+        self.assertEqual(self.request('GET', '/nowhere')[0], 404)
+        self.assertEqual(self.request('DELETE', '/cards')[0], 405)
+
+    def test_media_must_be_a_list_of_names(self):
+        card_id = self.request('GET', '/cards')[1][0]['id']
+        for media in ("x.png", [1, 2], None):
+            self.assertEqual(self.request('PUT', f'/cards/{card_id}', {'question_media': media})[0], 400)
+        self.assertNotIn('question_media', self.request('GET', f'/cards/{card_id}')[1])
+        status, card = self.request('PUT', f'/cards/{card_id}', {'question_media': ["x.png"]})
+        self.assertEqual((status, card['question_media']), (200, ["x.png"]))
+
+    def test_search(self):
+        status, found = self.request('GET', '/cards?q=PARIS')
+        self.assertEqual(status, 200)
+        self.assertEqual([card['answer'] for card in found], ["Paris"])
+        self.assertEqual(self.client().search("nothing like this"), [])
+
+    def test_next_goes_through_every_card(self):
+        seen = [self.client().next_card()['id'] for _ in range(3)]
+        self.assertEqual(sorted(seen), sorted(card['id'] for card in self.request('GET', '/cards')[1]))
+
+    def test_changes_are_written_to_the_deck_file(self):
+        self.request('POST', '/cards', {'question': "2 + 2?", 'answer': "4"})
+        self.run_in_loop(self.service.flush())
+        cards, _ = read_deck_file(self.deck_path)
+        self.assertEqual([card.question for card in cards][-1], "2 + 2?")
+
+
+class BatchTest(ServiceTestCase):
+    def test_batch_applies_every_operation(self):
+        first = self.request('GET', '/cards')[1][0]['id']
+        status, results = self.request('POST', '/batch', [
+            {'op': 'add', 'card': {'question': "2 + 2?", 'answer': "4"}},
+            {'op': 'update', 'id': first, 'card': {'answer': "Paris, France"}},
+            {'op': 'delete', 'id': first + 1},
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual(results[1]['answer'], "Paris, France")
+        self.assertEqual(results[2], {'id': first + 1, 'deleted': True})
+        self.assertEqual(len(self.request('GET', '/cards')[1]), 3)
+
+    def test_invalid_batch_changes_nothing(self):
+        for operations in ([{'op': 'add', 'card': {'question': "2 + 2?", 'answer': "4"}}, {'op': 'explode'}],
+                           [{'op': 'add', 'card': {'question': "2 + 2?", 'answer': "4"}}, {'op': 'update'}],
+                           [{'op': 'delete', 'id': 1}, {'op': 'add', 'card': {'question': "No answer"}}]):
+            status, answer = self.request('POST', '/batch', operations)
+            self.assertEqual(status, 400, answer)
+            self.assertEqual(len(self.request('GET', '/cards')[1]), 3)
+
+    def test_missing_cards_are_conflicts_not_failures(self):
+        status, results = self.request('POST', '/batch', [
+            {'op': 'add', 'card': {'question': "2 + 2?", 'answer': "4"}},
+            {'op': 'update', 'id': 99, 'card': {'answer': "x"}},
+            {'op': 'delete', 'id': 98},
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual(results[1], {'id': 99, 'error': "No such card"})
+        self.assertEqual(results[2], {'id': 98, 'deleted': False})
+        self.assertEqual(len(self.request('GET', '/cards')[1]), 4)
+
+
+class ConcurrentClientsTest(ServiceTestCase):
+    def test_many_clients_at_once(self):
+        clients, adds_each = 50, 10
+
+        def work(number):
+            client = self.client()
+            for i in range(adds_each):
+                client.add(Flashcard(f"Question {number}-{i}", "Answer"))
+            return len(client.search(f"Question {number}-"))
+
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            found = list(pool.map(work, range(clients)))
+        self.assertEqual(found, [adds_each] * clients)
+        cards = self.request('GET', '/cards')[1]
+        self.assertEqual(len(cards), 3 + clients * adds_each)
+        self.assertEqual(len({card['id'] for card in cards}), len(cards))
+
+
+class SyncTest(ServiceTestCase):
+    def test_sync_round_trip(self):
+        station_a, station_b = self.client(), self.client()
+        cards = station_a.list_cards()
+        cards[0].answer = "Paris, France"
+        del cards[1]
+        cards.append(Flashcard("2 + 2?", "4"))
+        station_a.sync(cards)
+
+        seen_by_b = {card.question: card.answer for card in station_b.list_cards()}
+        self.assertEqual(seen_by_b, {"What is the capital of France?": "Paris, France",
+                                     "Who painted the Mona Lisa?": "Leonardo da Vinci",
+                                     "2 + 2?": "4"})
+
+    def test_edit_of_a_card_deleted_elsewhere_keeps_the_edit(self):
+        station_a, station_b = self.client(), self.client()
+        cards_a, cards_b = station_a.list_cards(), station_b.list_cards()
+        del cards_b[0]
+        station_b.sync(cards_b)
+
+        cards_a[0].answer = "Paris, France"
+        station_a.sync(cards_a)  # Must not fail
+        station_a.sync(cards_a)  # ...and must not keep re-sending anything
+        answers = sorted(card.answer for card in self.client().list_cards())
+        self.assertEqual(answers, ["HyperText Markup Language", "Leonardo da Vinci", "Paris, France"])
+
+    def test_rejected_sync_can_be_retried(self):
+        client = self.client()
+        cards = client.list_cards()
+        cards.append(Flashcard("2 + 2?", "4"))
+        cards[0].question = ""
+        with self.assertRaises(DeckServiceError):
+            client.sync(cards)
+        # Nothing from the rejected batch was applied, so fixing it and retrying adds the card once
+        cards[0].question = "What is the capital of France?"
+        client.sync(cards)
+        self.assertEqual(len(self.client().list_cards()), 4)
+
+
+class UndoInClientModeTest(ServiceTestCase):
+    def test_undone_delete_reaches_the_service(self):
+        client = self.client()
+
+        class Deck(object):
+            flashcards = client.list_cards()
+
+        deck = Deck()
+        history = CommandLog(deck)
+        history.do(DeleteCardsCommand([deck.flashcards[0]]))
+        client.sync(deck.flashcards)
+        self.assertEqual(len(self.client().list_cards()), 2)
+
+        # The app reloads from the service on the Main Menu, then the user presses Undo
+        deck.flashcards = client.list_cards(reuse=deck.flashcards)
+        history.undo()
+        client.sync(deck.flashcards)
+
+        questions = [card.question for card in self.client().list_cards()]
+        self.assertIn("What is the capital of France?", questions)
+        self.assertEqual(len(questions), 3)
+        # Nothing is left over to send
+        client.sync(deck.flashcards)
+        self.assertEqual(len(self.client().list_cards()), 3)
+
+    def test_undone_delete_all_keeps_cards_added_elsewhere(self):
+        client = self.client()
+
+        class Deck(object):
+            flashcards = client.list_cards()
+
+        deck = Deck()
+        history = CommandLog(deck)
+        history.do(ClearCardsCommand())
+        client.sync(deck.flashcards)
+
+        # Another station adds a card while this one shows an empty deck
+        self.client().add(Flashcard("Added by B", "Yes"))
+        deck.flashcards = client.list_cards(reuse=deck.flashcards)
+        history.undo()
+        client.sync(deck.flashcards)
+
+        questions = sorted(card.question for card in self.client().list_cards())
+        self.assertEqual(questions, ["Added by B", "What does HTML stand for?",
+                                     "What is the capital of France?", "Who painted the Mona Lisa?"])
+
+
+if __name__ == "__main__":
+    unittest.main()